@@ -0,0 +1,33 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .tokens import resolve_token
+
+
+class ExpiringTokenAuthentication(BaseAuthentication):
+    """
+    "Authorization: Token <key>" with a key from LoginAPI.
+
+    Keys resolve through the cache (see api.tokens), so an authenticated
+    request normally costs one cache get and no database query.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        user = resolve_token(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        return user, key
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -1,3 +1,18 @@
 from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class ApiToken(models.Model):
+    """An API token issued by LoginAPI. Only the SHA-256 digest of the key is stored."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="api_tokens")
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "expires_at"], name="apitoken_user_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} token (expires {self.expires_at:%Y-%m-%d})"
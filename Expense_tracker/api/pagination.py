@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ExpenseCursorPagination(CursorPagination):
+    # Keyset on (date_created, id): every page is an index range scan, at any depth
+    ordering = ('-date_created', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -1,3 +1,261 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.bulk import BULK_MAX_ITEMS
+from expenses.cache import data_version, get_cache
+from expenses.forecast import forecast
+from expenses.models import Expense, ExpenseRollup, Wallet
+from expenses.summary import SpendSummary
+
+from .models import ApiToken
+
+
+class ExpenseListAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='api', password='pw')
+        self.other = User.objects.create_user(username='other', password='pw')
+        self.wallet = Wallet.objects.create(name='Trip', created_by=self.user)
+        now = timezone.now()
+        for i in range(7):
+            Expense.objects.create(
+                user=self.user, title=f'E{i}', amount=10 + i,
+                category='Food' if i % 2 else 'Bills',
+                wallet=self.wallet if i < 2 else None,
+                date_created=now - timedelta(days=i),
+            )
+        Expense.objects.create(user=self.other, title='Not mine', amount=99, category='Food')
+        self.client.force_login(self.user)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(reverse('expenses'))
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_walks_own_expenses_with_cursor(self):
+        titles = []
+        url = reverse('expenses') + '?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            titles += [row['title'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(titles, [f'E{i}' for i in range(7)])
+
+    def test_sparse_fieldset(self):
+        data = self.client.get(reverse('expenses'), {'fields': 'title,amount'}).json()
+        self.assertEqual(set(data['results'][0]), {'title', 'amount'})
+
+        response = self.client.get(reverse('expenses'), {'fields': 'title,bogus'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: bogus'})
+
+    def test_filters(self):
+        url = reverse('expenses')
+        self.assertEqual(len(self.client.get(url, {'category': 'Food'}).json()['results']), 3)
+        self.assertEqual(len(self.client.get(url, {'wallet': self.wallet.pk}).json()['results']), 2)
+        for malformed in ('abc', '²'):
+            self.assertEqual(len(self.client.get(url, {'wallet': malformed}).json()['results']), 7)
+        today = timezone.localdate()
+        start = (today - timedelta(days=2)).isoformat()
+        self.assertEqual(len(self.client.get(url, {'start': start}).json()['results']), 3)
+
+
+class ExpenseBulkCreateAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk', password='pw')
+        self.client.force_login(self.user)
+        self.url = reverse('api_bulk_add_expenses')
+
+    def post(self, items):
+        return self.client.post(self.url, items, content_type='application/json')
+
+    def test_creates_all_in_one_insert_and_updates_rollups(self):
+        items = [{'title': f'E{i}', 'amount': i + 1, 'category': 'Food' if i % 2 else 'Bills'} for i in range(100)]
+        version = data_version(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(items)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT') and 'expenses_expense"' in q['sql']]
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(inserts), 1)
+        ids = [result['id'] for result in response.json()['results']]
+        self.assertEqual(ids, list(Expense.objects.filter(user=self.user).order_by('id').values_list('id', flat=True)))
+
+        summary = SpendSummary(self.user)
+        self.assertEqual(summary.total_items, 100)
+        self.assertEqual(summary.total_expense, sum(range(1, 101)))
+        self.assertEqual(summary.max_expense, 100)
+        self.assertEqual(ExpenseRollup.objects.filter(user=self.user).count(), 2)
+        self.assertGreater(data_version(self.user.pk), version)
+
+    def test_reports_invalid_items_and_keeps_valid_ones(self):
+        mine = Wallet.objects.create(name='Mine', created_by=self.user)
+        mine.members.add(self.user)
+        theirs = Wallet.objects.create(name='Theirs', created_by=User.objects.create(username='x'))
+        response = self.post([
+            {'title': 'ok', 'amount': 5, 'wallet': mine.pk},
+            {'title': 'no amount'},
+            {'title': 'foreign', 'amount': 1, 'wallet': theirs.pk},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertIn('id', results[0])
+        self.assertIn('amount', results[1]['errors'])
+        self.assertIn('wallet', results[2]['errors'])
+        self.assertEqual(list(Expense.objects.values_list('title', 'wallet')), [('ok', mine.pk)])
+
+    def test_malformed_wallets_are_item_errors(self):
+        mine = Wallet.objects.create(name='Mine', created_by=self.user)
+        mine.members.add(self.user)
+        response = self.post([
+            {'title': 'list', 'amount': 1, 'wallet': [mine.pk]},
+            {'title': 'object', 'amount': 1, 'wallet': {'id': mine.pk}},
+            {'title': 'flag', 'amount': 1, 'wallet': True},
+            {'title': 'superscript', 'amount': 1, 'wallet': '²'},
+            {'title': 'text id', 'amount': 1, 'wallet': str(mine.pk)},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        for result in results[:4]:
+            self.assertEqual(result['errors'], {'wallet': ['Expected a wallet id.']})
+        self.assertIn('id', results[4])
+
+    def test_rejects_non_list_and_oversized_payloads(self):
+        self.assertEqual(self.post({'title': 'x', 'amount': 1}).status_code, 400)
+        self.assertEqual(self.post([{'title': 'x', 'amount': 1}] * (BULK_MAX_ITEMS + 1)).status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='api', password='pw')
+        Expense.objects.create(user=self.user, title='Lunch', amount=12)
+
+    def login(self):
+        response = self.client.post(reverse('api_login'), {'username': 'api', 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['token']
+
+    def get(self, token):
+        return self.client.get(reverse('expenses'), HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_token_is_stored_hashed(self):
+        token = self.login()
+        stored = ApiToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.digest, token)
+        self.assertGreater(stored.expires_at, timezone.now() + timedelta(days=1))
+
+    def test_cached_token_needs_no_auth_query(self):
+        token = self.login()
+        self.assertEqual(self.get(token).status_code, 200)
+        # Only the data version and the page itself: no token, user or session lookup
+        with self.assertNumQueries(2):
+            response = self.get(token)
+        self.assertEqual([row['title'] for row in response.json()['results']], ['Lunch'])
+
+    def test_expired_unknown_and_revoked_tokens_are_rejected(self):
+        token = self.login()
+        self.assertEqual(self.get('not-a-token').status_code, 401)
+
+        ApiToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        get_cache().clear()
+        self.assertEqual(self.get(token).status_code, 401)
+
+        token = self.login()
+        self.assertEqual(self.get(token).status_code, 200)
+        response = self.client.post(reverse('api_logout'), HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(token).status_code, 401)
+        # Logging in again cleared the expired token
+        self.assertFalse(ApiToken.objects.exists())
+
+
+class ExpenseForecastAPITests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='api', password='pw')
+        self.client.force_login(self.user)
+        self.this_month = timezone.localdate().replace(day=1)
+
+    def spend(self, months_ago, amount, category='Food'):
+        day = self.this_month - relativedelta(months=months_ago)
+        Expense.objects.create(
+            user=self.user, title='x', amount=amount, category=category,
+            date_created=timezone.make_aware(datetime(day.year, day.month, 10)),
+        )
+
+    def test_forecasts_each_category_and_the_total(self):
+        for months_ago in range(1, 7):
+            self.spend(months_ago, 100, 'Food')
+            self.spend(months_ago, 50 + 10 * (6 - months_ago), 'Bills')
+
+        data = self.client.get(reverse('api_expense_forecast')).json()
+
+        self.assertEqual(data['months'][0], self.this_month.isoformat()[:7])
+        self.assertEqual(len(data['months']), 3)
+        self.assertEqual(data['history_months'], 6)
+        series = {s['category']: s for s in data['categories']}
+        self.assertEqual(set(series), {'Food', 'Bills'})
+        self.assertEqual(series['Food']['forecast'], [100.0, 100.0, 100.0])
+        # Bills has grown 10 a month, so the trend carries on past its last month (100)
+        self.assertGreater(series['Bills']['forecast'][0], 100)
+        self.assertLess(series['Bills']['forecast'][0], series['Bills']['forecast'][2])
+
+        total = data['total']
+        for lower, upper in [total['intervals']['80'], total['intervals']['95']]:
+            for low, point, high in zip(lower, total['forecast'], upper):
+                self.assertLessEqual(low, point)
+                self.assertLessEqual(point, high)
+        # Intervals widen with the horizon
+        lower, upper = total['intervals']['95']
+        self.assertLessEqual(upper[0] - lower[0], upper[2] - lower[2])
+
+    def test_seasonal_pattern_is_carried_forward(self):
+        # Three years of a December spike, fitted for many series at once
+        months = np.arange(36)
+        base = np.where(months % 12 == 11, 500.0, 100.0)
+        values = np.vstack([base, base * 2, np.full(36, 80.0)])
+        point, spread, params = forecast(values, horizon=12)
+        self.assertEqual(point.shape, (3, 12))
+        self.assertTrue((params[:, 2] > 0).all())
+        self.assertEqual(point[0].argmax(), 11)
+        self.assertEqual(point[1].argmax(), 11)
+        self.assertTrue(np.allclose(point[2], 80.0))
+
+    def test_short_history_and_horizon(self):
+        self.spend(1, 100)
+        data = self.client.get(reverse('api_expense_forecast')).json()
+        self.assertIsNone(data['total'])
+        self.assertEqual(data['categories'], [])
+
+        for months_ago in range(2, 5):
+            self.spend(months_ago, 100)
+        data = self.client.get(reverse('api_expense_forecast') + '?months=1').json()
+        self.assertEqual(len(data['months']), 1)
+        self.assertEqual(len(data['total']['forecast']), 1)
+        self.assertEqual(len(data['total']['intervals']['80'][0]), 1)
+
+        self.assertEqual(self.client.get(reverse('api_expense_forecast') + '?months=4').status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_expense_forecast') + '?months=x').status_code, 400)
+
+    def test_refits_only_when_data_changes(self):
+        for months_ago in range(1, 5):
+            self.spend(months_ago, 100)
+        url = reverse('api_expense_forecast')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any('expenses_expenserollup' in q['sql'] for q in queries.captured_queries))
 
-# Create your tests here.
+        self.spend(1, 400)
+        self.assertGreater(self.client.get(url).json()['total']['forecast'][0], 100)
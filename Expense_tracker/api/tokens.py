@@ -0,0 +1,61 @@
+# api/tokens.py
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from expenses.cache import get_cache
+from .models import ApiToken
+
+TOKEN_TTL = getattr(settings, 'SPENDORA_API_TOKEN_TTL', 30 * 24 * 60 * 60)
+
+# How long a resolved token is trusted from the cache before the DB is asked
+# again; also the longest a revoked or deactivated login can keep working
+# on another web worker.
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'SPENDORA_API_TOKEN_CACHE_TIMEOUT', 60)
+
+
+def digest(key):
+    # Keys are 256 random bits, so a fast hash is enough; no PBKDF2 per request
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_key(token_digest):
+    return f"spendora:api-token:{token_digest}"
+
+
+def issue_token(user):
+    """Create a token for `user` and return (key, expires_at); the key is not stored."""
+    now = timezone.now()
+    ApiToken.objects.filter(user=user, expires_at__lte=now).delete()
+    key = secrets.token_urlsafe(32)
+    token = ApiToken.objects.create(user=user, digest=digest(key), expires_at=now + timedelta(seconds=TOKEN_TTL))
+    return key, token.expires_at
+
+
+def resolve_token(key):
+    """Return the active user for `key`, or None if it is unknown, expired or the user is inactive."""
+    token_digest = digest(key)
+    cache = get_cache()
+    cached = cache.get(cache_key(token_digest))
+    if cached is None:
+        token = ApiToken.objects.select_related('user').filter(digest=token_digest).first()
+        if token is None:
+            return None
+        cached = (token.user, token.expires_at)
+        remaining = (token.expires_at - timezone.now()).total_seconds()
+        if remaining > 0:
+            cache.set(cache_key(token_digest), cached, min(TOKEN_CACHE_TIMEOUT, remaining))
+
+    user, expires_at = cached
+    if expires_at <= timezone.now() or not user.is_active:
+        return None
+    return user
+
+
+def revoke_token(key):
+    token_digest = digest(key)
+    ApiToken.objects.filter(digest=token_digest).delete()
+    get_cache().delete(cache_key(token_digest))
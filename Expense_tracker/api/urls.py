@@ -1,17 +1,20 @@
 # api_urls.py
 from django.urls import path
 from .views import (
-    SignupAPI, LoginAPI, HelloAPI,
-    ExpenseListAPI, ExpenseCreateAPI,
+    SignupAPI, LoginAPI, LogoutAPI, HelloAPI,
+    ExpenseListAPI, ExpenseCreateAPI, ExpenseBulkCreateAPI, ExpenseForecastAPI,
     ExpenseUpdateAPI, ExpenseDeleteAPI
 )
 
 urlpatterns = [
     path('signup/', SignupAPI.as_view(), name='api_signup'),
     path('login/', LoginAPI.as_view(), name='api_login'),
+    path('logout/', LogoutAPI.as_view(), name='api_logout'),
     path('hello/', HelloAPI.as_view(), name='hello'),
     path('expenses/', ExpenseListAPI.as_view(), name='expenses'),
     path('expenses/create/', ExpenseCreateAPI.as_view(), name='api_add_expense'),  # Note "create"
+    path('expenses/bulk/', ExpenseBulkCreateAPI.as_view(), name='api_bulk_add_expenses'),
+    path('expenses/forecast/', ExpenseForecastAPI.as_view(), name='api_expense_forecast'),
     path('expenses/update/<int:id>/', ExpenseUpdateAPI.as_view(), name='update_expense'),
     path('expenses/delete/<int:id>/', ExpenseDeleteAPI.as_view(), name='delete_expense'),
 ]
@@ -1,11 +1,25 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.shortcuts import get_object_or_404
-from expenses.models import Expense
-from expenses.serializers import ExpenseSerializer
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from expenses.cache import cached_context, data_version_condition
+from expenses.bulk import BULK_MAX_ITEMS, bulk_create_expenses
+from expenses.models import Expense, Wallet
+from expenses.filters import filter_expenses
+from expenses.serializers import ExpenseReadSerializer, ExpenseSerializer
+from .authentication import ExpiringTokenAuthentication
+from .pagination import ExpenseCursorPagination
+from .tokens import issue_token, revoke_token
+
+# API tokens first, then whatever the project configures (sessions for the browsable API)
+TOKEN_FIRST = [ExpiringTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
 
 
 class SignupAPI(APIView):
@@ -31,18 +45,66 @@ class LoginAPI(APIView):
         user = authenticate(username=username, password=password)
 
         if user:
-            return Response({"msg": "Login successful!"}, status=200)
+            # The password is hashed once here; later calls send the token instead
+            token, expires_at = issue_token(user)
+            return Response({"msg": "Login successful!", "token": token, "expires_at": expires_at}, status=200)
         return Response({"error": "Invalid credentials"}, status=401)
 
+class LogoutAPI(APIView):
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class HelloAPI(APIView):
     def get(self, request):
         return Response({"message": "Spendora API working!"})
 
 class ExpenseListAPI(APIView):
+    authentication_classes = TOKEN_FIRST
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(data_version_condition('expenses'))
     def get(self, request):
-        expenses = Expense.objects.all()
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data)
+        expenses = filter_expenses(Expense.objects.filter(user=request.user), request.query_params)
+
+        fields = None
+        if request.query_params.get('fields'):
+            fields = request.query_params['fields'].split(',')
+        serializer = ExpenseReadSerializer(fields=fields)
+        unknown = [name for name in fields or () if name not in serializer.fields]
+        if unknown:
+            return Response({"error": f"Unknown fields: {', '.join(unknown)}"}, status=400)
+
+        # Plain dicts from .values(), with the columns the cursor orders by
+        paginator = ExpenseCursorPagination()
+        page = paginator.paginate_queryset(serializer.values(expenses, 'id', 'date_created'), request, view=self)
+        return paginator.get_paginated_response(serializer.serialize(page))
+
+class ExpenseForecastAPI(APIView):
+    authentication_classes = TOKEN_FIRST
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # NumPy is only loaded once someone asks for a forecast
+        from expenses.forecast import HORIZON, SpendForecast, first_months
+
+        try:
+            months = int(request.query_params.get('months', HORIZON))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= HORIZON:
+            return Response({"error": f"months must be between 1 and {HORIZON}"}, status=400)
+
+        # Fitted once per data version and month, for the full horizon
+        start = timezone.localdate().replace(day=1)
+        data = cached_context(
+            request.user, f'forecast:{start.isoformat()}',
+            lambda: SpendForecast(request.user).as_dict(),
+        )
+        return Response(first_months(data, months))
 
 class ExpenseCreateAPI(APIView):
     def post(self, request):
@@ -52,6 +114,71 @@ class ExpenseCreateAPI(APIView):
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
+class ExpenseBulkCreateAPI(APIView):
+    authentication_classes = TOKEN_FIRST
+    permission_classes = [IsAuthenticated]
+    item_fields = ['title', 'amount', 'category', 'date_created']
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty JSON array of expenses"}, status=400)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({"error": f"At most {BULK_MAX_ITEMS} expenses per request"}, status=400)
+
+        # Wallets are checked with one query for the whole batch
+        wallets = set(
+            Wallet.objects.filter(members=request.user).values_list('pk', flat=True)
+        ) if any(isinstance(item, dict) and item.get('wallet') for item in items) else set()
+
+        # One serializer validates every item, so its fields are only built once
+        serializer = ExpenseSerializer(fields=self.item_fields)
+        results = []
+        expenses = []
+        for index, item in enumerate(items):
+            try:
+                data = serializer.run_validation(item)
+            except ValidationError as exc:
+                results.append({"index": index, "errors": exc.detail})
+                continue
+            wallet = item.get('wallet')
+            if wallet is not None:
+                wallet = wallet_pk(wallet)
+                if wallet is None:
+                    results.append({"index": index, "errors": {"wallet": ["Expected a wallet id."]}})
+                    continue
+                if wallet not in wallets:
+                    results.append({"index": index, "errors": {"wallet": ["Not a wallet you belong to."]}})
+                    continue
+            expenses.append(Expense(user=request.user, wallet_id=wallet, **data))
+            results.append({"index": index})
+
+        created = iter(bulk_create_expenses(expenses) if expenses else [])
+        for result in results:
+            if "errors" not in result:
+                result["id"] = next(created).pk
+
+        if not expenses:
+            code = status.HTTP_400_BAD_REQUEST
+        elif len(expenses) < len(items):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_201_CREATED
+        return Response({"created": len(expenses), "results": results}, status=code)
+
+def wallet_pk(value):
+    """`value` as a wallet primary key, or None if it is not one (e.g. a list or a name)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return None
+
 class ExpenseUpdateAPI(APIView):
     def put(self, request, id):
         try:
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from expenses.models import Expense
+from expenses.stats import unusual
 from .models import Insight
 from django.db.models import Sum
 
@@ -42,13 +43,14 @@ def generate_insights(user):
             message=f"Highest spending category: {top_cat['category']} (₹{top_cat['total']})."
         )
 
-    # 3. Large transaction alert
+    # 3. Large transaction alert, judged against the user's own running statistics
     last_expense = Expense.objects.filter(user=user).order_by('-id').first()
+    reason = last_expense and unusual(last_expense)
 
-    if last_expense and last_expense.amount >= 1000:
+    if reason:
         Insight.objects.create(
             user=user,
-            message=f"High transaction detected: ₹{last_expense.amount} on {last_expense.category}."
+            message=f"High transaction detected: ₹{last_expense.amount} on {last_expense.category}, {reason}."[:255]
         )
 
     return True
@@ -1,7 +1,8 @@
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
-from .insights import generate_insights
+from .tasks import schedule_insights
 
 @receiver(user_logged_in)
 def create_insights(sender, user, request, **kwargs):
-    generate_insights(user)
+    # Only queues the work; insights are generated in a background thread
+    schedule_insights(user.pk)
@@ -0,0 +1,37 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+
+from expenses.cache import get_cache
+from .insights import generate_insights
+
+logger = logging.getLogger(__name__)
+
+# Repeated logins inside this window trigger at most one insight run per user
+INSIGHT_WINDOW = getattr(settings, 'SPENDORA_INSIGHT_WINDOW', 10 * 60)
+
+# One background thread per web worker; insight runs are short and rare
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='insights')
+
+
+def schedule_insights(user_id):
+    """Queue generate_insights for the user unless a run was queued within the window."""
+    if not get_cache().add(f"spendora:insights:{user_id}", True, INSIGHT_WINDOW):
+        return False
+    transaction.on_commit(lambda: executor.submit(run_insights, user_id))
+    return True
+
+
+def run_insights(user_id):
+    close_old_connections()
+    try:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            generate_insights(user)
+    except Exception:
+        logger.exception("Insight generation failed for user %s", user_id)
+    finally:
+        close_old_connections()
@@ -1,3 +1,68 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from expenses.cache import get_cache
+from expenses.models import Expense
+from .insights import generate_insights
+from .models import Insight
+from . import tasks
+
+
+class InlineExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append(args)
+        fn(*args)
+
+
+class DeferredInsightTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        Expense.objects.create(user=self.user, title='Laptop', amount=1500, category='Shopping')
+        self.executor = InlineExecutor()
+        patcher = mock.patch.object(tasks, 'executor', self.executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self):
+        return self.client.post(reverse('login'), {'username': 'asha', 'password': 'pass12345'})
+
+    def test_login_only_queues_insights(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.login()
+            self.assertFalse(Insight.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+
+    def test_repeated_logins_are_coalesced(self):
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.login()
+        self.assertEqual(self.executor.calls, [(self.user.pk,)])
+        self.assertTrue(Insight.objects.filter(user=self.user).exists())
+
+
+class LargeTransactionInsightTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        for i in range(15):
+            Expense.objects.create(user=self.user, title='Rent', amount=20000 + 100 * (i % 3), category='Rent')
+
+    def alerts(self):
+        generate_insights(self.user)
+        return list(Insight.objects.filter(user=self.user, message__startswith='High transaction'))
+
+    def test_typical_large_amount_is_not_flagged(self):
+        # Well over the old fixed threshold of 1000, but normal for this user
+        self.assertEqual(self.alerts(), [])
 
-# Create your tests here.
+    def test_outlier_is_flagged(self):
+        Expense.objects.create(user=self.user, title='Deposit', amount=60000, category='Rent')
+        [alert] = self.alerts()
+        self.assertIn('₹60000.00 on Rent', alert.message)
+        self.assertIn('standard deviations above', alert.message)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Expense
+from .models import Bill, Expense, ExpenseStats
 # Register your models here.
 
 admin.site.register(Expense)
+admin.site.register(Bill)
+admin.site.register(ExpenseStats)
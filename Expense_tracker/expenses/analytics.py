@@ -0,0 +1,137 @@
+# expenses/analytics.py
+# Vectorized spend analytics behind the analytics page. NumPy is heavy to import, so
+# views import this module on first use instead of at worker start-up.
+import numpy as np
+from django.db.models import BigIntegerField
+from django.db.models.functions import Cast, TruncDate
+from django.utils import timezone
+
+from .models import Expense
+from .money import MINOR_UNITS
+
+PERCENTILES = (50, 75, 90, 95, 99)
+WINDOWS = (7, 30)
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# Days of daily/rolling series returned to the page; everything else covers the full history
+SERIES_DAYS = 180
+
+
+def load_columns(user):
+    """
+    The user's expenses as three aligned arrays, from one query:
+    local day (datetime64[D]), amount in paise (int64) and category code
+    (int32, an index into the returned category names).
+    """
+    rows = (
+        Expense.objects.filter(user=user)
+        .annotate(day=TruncDate('date_created'), paise=Cast('amount', BigIntegerField()))
+        .values_list('day', 'paise', 'category')
+        .order_by()
+    )
+    days, paise, categories = tuple(zip(*rows.iterator(chunk_size=10_000))) or ((), (), ())
+
+    names = {}
+    codes = np.fromiter((names.setdefault(c, len(names)) for c in categories), dtype=np.int32, count=len(categories))
+    return (
+        np.array(days, dtype='datetime64[D]'),
+        np.array(paise, dtype=np.int64),
+        codes,
+        list(names),
+    )
+
+
+class SpendAnalytics:
+    """
+    Rolling averages, percentiles, day-of-week profile, month-over-month
+    deltas and category shares for one user.
+
+    The expense columns are loaded once (load_columns) and every figure is
+    a handful of NumPy operations over them, so the cost is one query plus
+    linear array work however long the history is.
+    """
+
+    def __init__(self, days, paise, codes, categories, today=None):
+        self.today = np.datetime64(today or timezone.localdate(), 'D')
+        self.days, self.paise, self.codes, self.categories = days, paise, codes, categories
+
+    @classmethod
+    def for_user(cls, user, today=None):
+        return cls(*load_columns(user), today=today)
+
+    def as_dict(self):
+        if not len(self.paise):
+            return {'count': 0}
+        return {
+            'count': int(len(self.paise)),
+            'percentiles': self.percentiles(),
+            **self.daily(),
+            'weekdays': self.weekdays(),
+            'months': self.months(),
+            'categories': self.category_shares(),
+        }
+
+    def percentiles(self):
+        values = np.percentile(self.paise, PERCENTILES) / MINOR_UNITS
+        return {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, values)}
+
+    def daily(self):
+        start = min(self.days.min(), self.today - SERIES_DAYS + 1)
+        length = int((self.today - start).astype(int)) + 1
+        index = (self.days - start).astype(np.int64)
+        # Future-dated expenses are left out of the daily series
+        keep = index < length
+        totals = np.bincount(index[keep], weights=self.paise[keep], minlength=length) / MINOR_UNITS
+
+        # Trailing window sums from one cumulative sum: total[i] - total[i - k]
+        cumulative = np.concatenate(([0.0], np.cumsum(totals)))
+        series = {'days': [str(d) for d in np.arange(self.today - SERIES_DAYS + 1, self.today + 1)],
+                  'daily': np.round(totals[-SERIES_DAYS:], 2).tolist()}
+        for window in WINDOWS:
+            lagged = cumulative[np.maximum(np.arange(1, length + 1) - window, 0)]
+            rolling = (cumulative[1:] - lagged) / window
+            series[f'rolling_{window}'] = np.round(rolling[-SERIES_DAYS:], 2).tolist()
+        return series
+
+    def weekdays(self):
+        # 1970-01-01 was a Thursday, so (days since epoch + 3) % 7 puts Monday at 0
+        weekday = (self.days.astype(np.int64) + 3) % 7
+        totals = np.bincount(weekday, weights=self.paise, minlength=7) / MINOR_UNITS
+        counts = np.bincount(weekday, minlength=7)
+
+        # Average spend per calendar occurrence of each weekday in the history
+        span = np.arange(self.days.min(), self.days.max() + 1)
+        occurrences = np.bincount((span.astype(np.int64) + 3) % 7, minlength=7)
+        return [
+            {'day': name, 'total': round(float(t), 2), 'count': int(c), 'average': round(float(t / n), 2) if n else 0}
+            for name, t, c, n in zip(WEEKDAYS, totals, counts, occurrences)
+        ]
+
+    def months(self):
+        months = self.days.astype('datetime64[M]')
+        first = months.min()
+        index = (months - first).astype(np.int64)
+        totals = np.bincount(index, weights=self.paise) / MINOR_UNITS
+        change = np.diff(totals, prepend=np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent = np.where(totals - change > 0, change / (totals - change) * 100, np.nan)
+        labels = np.arange(first, first + len(totals))
+        return [
+            {
+                'month': str(month),
+                'total': round(float(total), 2),
+                'change': None if np.isnan(delta) else round(float(delta), 2),
+                'change_percent': None if np.isnan(pct) else round(float(pct), 1),
+            }
+            for month, total, delta, pct in zip(labels, totals, change, percent)
+        ]
+
+    def category_shares(self):
+        totals = np.bincount(self.codes, weights=self.paise, minlength=len(self.categories))
+        shares = totals / totals.sum() if totals.sum() else totals
+        order = np.argsort(-totals, kind='stable')
+        return [
+            {'category': self.categories[i], 'total': round(float(totals[i] / MINOR_UNITS), 2),
+             'share': round(float(shares[i]) * 100, 1)}
+            for i in order
+        ]
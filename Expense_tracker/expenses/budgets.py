@@ -0,0 +1,40 @@
+# expenses/budgets.py
+from decimal import Decimal
+
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Budget, ExpenseRollup
+from .money import MoneyField
+
+
+def budget_progress(user):
+    """
+    The user's budgets with spending against each, in one query.
+
+    Spent per budget comes from a correlated subquery over ExpenseRollup;
+    its integer paise come back as a Decimal, like Budget.amount.
+    """
+    spent = (
+        ExpenseRollup.objects.filter(user=OuterRef('user'), category=OuterRef('category'))
+        .values('category')
+        .annotate(spent=Sum('total'))
+        .values('spent')
+    )
+    budgets = Budget.objects.filter(user=user).annotate(
+        spent=Coalesce(Subquery(spent), Value(Decimal('0')), output_field=MoneyField())
+    )
+
+    budget_list = []
+    for b in budgets:
+        percent = (b.spent / b.amount) * 100 if b.amount > 0 else 0
+        budget_list.append({
+            'category': b.category,
+            'limit': b.amount,
+            'spent': b.spent,
+            'percent': min(percent, 100),
+            'remaining': b.amount - b.spent,
+            'color': "danger" if percent >= 90 else "warning" if percent >= 70 else "primary",
+            'icon': b.icon
+        })
+    return budget_list
@@ -0,0 +1,25 @@
+# expenses/bulk.py
+from django.conf import settings
+from django.db import transaction
+
+from . import rollups, stats
+from .cache import bump_data_versions
+from .models import Expense
+
+# Upper bound on the number of expenses one bulk API call may create
+BULK_MAX_ITEMS = getattr(settings, 'SPENDORA_BULK_MAX_ITEMS', 1000)
+
+
+@transaction.atomic
+def bulk_create_expenses(expenses, batch_size=None):
+    """
+    Insert unsaved Expense objects with bulk_create and bring the rollups and
+    data versions up to date, since bulk_create skips the post_save signals
+    that normally do it. Returns the created objects (with primary keys on
+    backends that can return them, such as PostgreSQL and SQLite).
+    """
+    created = Expense.objects.bulk_create(expenses, batch_size=batch_size)
+    rollups.add_expenses(created)
+    stats.add_expenses(created)
+    bump_data_versions({expense.user_id for expense in created})
+    return created
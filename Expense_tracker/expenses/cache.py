@@ -0,0 +1,98 @@
+# expenses/cache.py
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+# Any backend listed in settings.CACHES works; with several gunicorn workers
+# point this at a shared one (Redis, Memcached or DatabaseCache) rather than locmem.
+CACHE_ALIAS = getattr(settings, 'SPENDORA_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'SPENDORA_CACHE_TIMEOUT', 60 * 60)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def data_version(user_id):
+    version = DataVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_data_version(user_id):
+    """Invalidate everything cached for `user_id` by moving to a new version."""
+    if DataVersion.objects.filter(user_id=user_id).update(version=F('version') + 1, changed_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(user_id=user_id)
+    except IntegrityError:
+        bump_data_version(user_id)
+
+
+def bump_data_versions(user_ids):
+    """bump_data_version for many users in two queries."""
+    user_ids = set(user_ids)
+    DataVersion.objects.filter(user_id__in=user_ids).update(version=F('version') + 1, changed_at=timezone.now())
+    DataVersion.objects.bulk_create(
+        [DataVersion(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def request_data_version(request):
+    """(version, changed_at) for request.user, looked up once per request."""
+    if '_data_version' not in request.__dict__:
+        request.__dict__['_data_version'] = (
+            DataVersion.objects.filter(user_id=request.user.pk).values_list('version', 'changed_at').first()
+            or (0, None)
+        )
+    return request.__dict__['_data_version']
+
+
+def cached_context(user, name, build, version=None):
+    """
+    Return build() for `user`, cached under the user's current data version.
+
+    Writes bump the version instead of deleting keys, so a stale entry is
+    simply never looked up again and expires on its own.
+    """
+    if version is None:
+        version = data_version(user.pk)
+    key = f"spendora:{name}:{user.pk}:{version}"
+    cache = get_cache()
+    context = cache.get(key)
+    if context is None:
+        context = build()
+        cache.set(key, context, CACHE_TIMEOUT)
+    return context
+
+
+def data_version_condition(name):
+    """
+    Conditional GET for JSON views that only show request.user's own data.
+
+    Not for HTML pages: those embed a CSRF token tied to the session, which
+    the data version knows nothing about, so a 304 could hand the browser
+    back a page with a token that no longer works.
+
+    The ETag is the user's data version and Last-Modified its changed_at,
+    both read with one primary key lookup, so a client that is up to date
+    gets 304 Not Modified before the view runs any of its queries. Goes
+    inside login_required (or a DRF view's permission checks).
+    """
+    def etag(request, *args, **kwargs):
+        return f"{name}-{request.user.pk}-{request_data_version(request)[0]}"
+
+    def last_modified(request, *args, **kwargs):
+        return request_data_version(request)[1]
+
+    def decorator(view):
+        # no-cache: browsers keep the copy but must revalidate before reusing it
+        return cache_control(private=True, no_cache=True)(condition(etag, last_modified)(view))
+    return decorator
@@ -0,0 +1,44 @@
+# expenses/filters.py
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def parse_day(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def filter_expenses(queryset, params):
+    """
+    Narrow an Expense queryset by the optional `start`, `end` (YYYY-MM-DD,
+    inclusive), `category` and `wallet` (id) query parameters.
+
+    Date bounds become a half-open datetime range so the filter stays a plain
+    range scan on (user, date_created) rather than a per-row date cast.
+    Unparseable dates and wallet ids are ignored.
+    """
+    start = parse_day(params.get('start'))
+    end = parse_day(params.get('end'))
+    category = params.get('category')
+    wallet = params.get('wallet')
+
+    if start:
+        queryset = queryset.filter(date_created__gte=day_start(start))
+    if end:
+        queryset = queryset.filter(date_created__lt=day_start(end + timedelta(days=1)))
+    if category:
+        queryset = queryset.filter(category=category)
+    if wallet:
+        try:
+            queryset = queryset.filter(wallet_id=int(wallet))
+        except ValueError:
+            pass
+    return queryset
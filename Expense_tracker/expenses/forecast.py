@@ -0,0 +1,187 @@
+# expenses/forecast.py
+# Monthly spend forecasts for the forecast API. NumPy is heavy to import, so
+# views import this module on first use instead of at worker start-up.
+from itertools import product
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import ExpenseRollup
+
+HORIZON = 3
+SEASON = 12
+
+# A series needs this many months since its first spend to be forecast
+MIN_MONTHS = 3
+
+# Smoothing parameters tried for every series; each series keeps the
+# combination with the smallest one-step-ahead squared error
+ALPHAS = (0.1, 0.3, 0.5, 0.8)
+BETAS = (0.0, 0.1, 0.3)
+GAMMAS = (0.05, 0.2)
+
+# Two-sided normal quantiles for the prediction intervals
+INTERVALS = {'80': 1.2816, '95': 1.96}
+
+TOTAL = 'Total'
+
+
+def monthly_series(user, before):
+    """
+    (months, names, values) for the user's complete months before `before`:
+    a list of month start dates, the category names, and a float array of
+    shape (len(names) + 1, len(months)) whose last row is the all-category total.
+    """
+    rows = list(
+        ExpenseRollup.objects.filter(user=user, month__lt=before)
+        .values('category', 'month')
+        .annotate(total=Sum('total'))
+        .order_by()
+    )
+    if not rows:
+        return [], [], np.zeros((1, 0))
+
+    first = min(row['month'] for row in rows)
+    length = (before.year - first.year) * 12 + before.month - first.month
+    months = [first + relativedelta(months=i) for i in range(length)]
+    names = sorted({row['category'] for row in rows})
+    position = {name: i for i, name in enumerate(names)}
+
+    values = np.zeros((len(names) + 1, length))
+    for row in rows:
+        month = row['month']
+        values[position[row['category']], (month.year - first.year) * 12 + month.month - first.month] += float(row['total'])
+    values[-1] = values[:-1].sum(axis=0)
+    return months, names, values
+
+
+def smooth(values, seasonal):
+    """
+    Additive Holt(-Winters) exponential smoothing of every row of `values`
+    for every parameter combination at once.
+
+    State arrays have shape (combinations, series), so the whole fit is one
+    loop over the months. Series that start later than the first month are
+    held at their first value until they begin. Returns the final level,
+    trend and seasonal states with the per-combination squared error and
+    the number of errors summed.
+    """
+    gammas = GAMMAS if seasonal else (0.0,)
+    params = np.array(list(product(ALPHAS, BETAS, gammas)))
+    alpha, beta, gamma = (params[:, i, None] for i in range(3))
+    combinations = len(params)
+    series, length = values.shape
+
+    started = values > 0
+    first = np.where(started.any(axis=1), started.argmax(axis=1), length)
+
+    season = np.zeros((combinations, series, SEASON))
+    if seasonal:
+        # First full year sets the level and the seasonal pattern around it
+        level = np.broadcast_to(values[:, :SEASON].mean(axis=1), (combinations, series)).copy()
+        season[:] = values[:, :SEASON] - values[:, :SEASON].mean(axis=1, keepdims=True)
+        begin = SEASON
+    else:
+        level = np.broadcast_to(values[np.arange(series), np.minimum(first, length - 1)], (combinations, series)).copy()
+        begin = 0
+    trend = np.zeros((combinations, series))
+    sse = np.zeros((combinations, series))
+    count = np.zeros(series)
+
+    for t in range(begin, length):
+        active = t > first if not seasonal else np.ones(series, dtype=bool)
+        s = season[:, :, t % SEASON]
+        error = values[:, t] - (level + trend + s)
+        error = np.where(active, error, 0.0)
+        level = level + trend + alpha * error
+        trend = trend + alpha * beta * error
+        season[:, :, t % SEASON] = s + gamma * error
+        sse += error ** 2
+        count += active
+    return params, level, trend, season, sse, count
+
+
+def forecast(values, horizon=HORIZON):
+    """
+    Point forecasts and interval half-widths of shape (series, horizon) for
+    every row of `values`, plus the chosen (alpha, beta, gamma) per row.
+    """
+    seasonal = values.shape[1] >= 2 * SEASON
+    params, level, trend, season, sse, count = smooth(values, seasonal)
+
+    best = sse.argmin(axis=0)
+    rows = np.arange(values.shape[0])
+    level, trend, season, sse = level[best, rows], trend[best, rows], season[best, rows], sse[best, rows]
+    alpha, beta, gamma = params[best].T
+
+    steps = np.arange(1, horizon + 1)
+    ahead = (values.shape[1] + steps - 1) % SEASON
+    point = level[:, None] + steps * trend[:, None] + season[:, ahead]
+
+    # h-step variance of additive Holt-Winters: sigma^2 (1 + sum of c_j^2, j < h),
+    # c_j = alpha (1 + j beta) + gamma when j is a whole number of seasons
+    sigma = np.sqrt(sse / np.maximum(count, 1))
+    j = np.arange(1, horizon)
+    c = alpha[:, None] * (1 + j * beta[:, None]) + gamma[:, None] * (j % SEASON == 0)
+    spread = sigma[:, None] * np.sqrt(1 + np.concatenate([np.zeros((len(rows), 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    return point, spread, params[best]
+
+
+class SpendForecast:
+    """
+    Forecast of the next HORIZON months of spend, per category and in total,
+    from the user's complete months of ExpenseRollup totals. The current
+    month is the first month forecast.
+    """
+
+    def __init__(self, user, today=None):
+        today = today or timezone.localdate()
+        self.start = today.replace(day=1)
+        self.months, self.names, self.values = monthly_series(user, self.start)
+
+    def as_dict(self, horizon=HORIZON):
+        months = [(self.start + relativedelta(months=i)).isoformat()[:7] for i in range(horizon)]
+        data = {'months': months, 'history_months': len(self.months), 'total': None, 'categories': []}
+        if len(self.months) < MIN_MONTHS:
+            return data
+
+        point, spread, params = forecast(self.values, horizon)
+        started = (self.values > 0).argmax(axis=1)
+        for i, name in enumerate([*self.names, TOTAL]):
+            if not self.values[i].any() or len(self.months) - started[i] < MIN_MONTHS:
+                continue
+            series = {
+                'category': name,
+                'forecast': np.round(np.maximum(point[i], 0), 2).tolist(),
+                'intervals': {
+                    level: [
+                        np.round(np.maximum(point[i] - z * spread[i], 0), 2).tolist(),
+                        np.round(np.maximum(point[i] + z * spread[i], 0), 2).tolist(),
+                    ]
+                    for level, z in INTERVALS.items()
+                },
+                'model': dict(zip(('alpha', 'beta', 'gamma'), (float(p) for p in params[i]))),
+            }
+            if i == len(self.names):
+                data['total'] = series
+            else:
+                data['categories'].append(series)
+        return data
+
+
+def first_months(data, months):
+    """SpendForecast.as_dict() output cut down to its first `months` months."""
+    def cut(series):
+        return {
+            **series,
+            'forecast': series['forecast'][:months],
+            'intervals': {level: [lower[:months], upper[:months]] for level, (lower, upper) in series['intervals'].items()},
+        }
+    return {
+        **data,
+        'months': data['months'][:months],
+        'total': data['total'] and cut(data['total']),
+        'categories': [cut(series) for series in data['categories']],
+    }
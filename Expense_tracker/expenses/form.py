@@ -1,5 +1,6 @@
 # expenses/forms.py
 from django import forms
+from .imports import DEBITS_NEGATIVE, DEBITS_POSITIVE
 from .models import Expense
 
 DEFAULT_CATEGORIES = [
@@ -28,3 +29,32 @@ class ExpenseForm(forms.ModelForm):
             'amount': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Enter amount'}),
             'date_created': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         }
+
+class ExpenseImportForm(forms.Form):
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}))
+    # Optional header names, for statements whose columns are not recognised
+    title_column = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Description'}))
+    amount_column = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Debit'}))
+    category_column = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Category'}))
+    date_column = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Transaction Date'}))
+    date_format = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. %d/%m/%Y'}))
+    debits = forms.ChoiceField(
+        choices=[
+            (DEBITS_POSITIVE, 'Expenses are positive amounts (leave out negative rows)'),
+            (DEBITS_NEGATIVE, 'Expenses are negative amounts (leave out positive rows)'),
+        ],
+        required=False,
+        initial=DEBITS_POSITIVE,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def clean_debits(self):
+        return self.cleaned_data['debits'] or DEBITS_POSITIVE
+
+    def columns(self):
+        return {
+            'title': self.cleaned_data['title_column'],
+            'amount': self.cleaned_data['amount_column'],
+            'category': self.cleaned_data['category_column'],
+            'date_created': self.cleaned_data['date_column'],
+        }
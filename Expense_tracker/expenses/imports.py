@@ -0,0 +1,191 @@
+# expenses/imports.py
+import csv
+import re
+from datetime import datetime, time
+from decimal import InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .bulk import bulk_create_expenses
+from .models import Expense
+from .money import MAX_AMOUNT, to_money
+
+IMPORT_BATCH_SIZE = getattr(settings, 'SPENDORA_IMPORT_BATCH_SIZE', 2000)
+
+# Header names recognised for each Expense field, compared case-insensitively.
+# The header export_csv writes (Title, Amount, Category, Date) matches as is.
+COLUMN_ALIASES = {
+    'title': ('title', 'description', 'details', 'narration', 'particulars', 'payee', 'merchant', 'memo'),
+    'amount': ('amount', 'debit', 'withdrawal', 'value'),
+    'category': ('category',),
+    'date_created': ('date', 'date_created', 'transaction date', 'posting date', 'posted date', 'value date'),
+}
+REQUIRED_COLUMNS = ('title', 'amount')
+
+# Only this many row errors are kept for the report; the rest are just counted
+MAX_ERRORS = 20
+
+# How a signed amount column marks expenses; rows of the other sign are credits
+# (refunds, salary) and are left out
+DEBITS_POSITIVE = 'positive'
+DEBITS_NEGATIVE = 'negative'
+DEBIT_SIGNS = (DEBITS_POSITIVE, DEBITS_NEGATIVE)
+
+# Currency markers are removed whole, so the dot in "Rs. 500" is not taken for a decimal point
+CURRENCY = re.compile(r'₹|\b(?:rs|inr)\b\.?', re.IGNORECASE)
+NOT_AMOUNT = re.compile(r'[^\d.\-()]')
+
+
+class InvalidStatement(ValueError):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.credits = 0
+        self.errors = []
+
+    def skip(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Line {line}: {message}")
+
+
+def map_columns(header, columns=None):
+    """
+    Return {field: column index} for a statement's header row.
+
+    `columns` maps fields to header names and wins over COLUMN_ALIASES.
+    """
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        wanted = (columns or {}).get(field)
+        candidates = (wanted,) if wanted else aliases
+        for name in candidates:
+            if name.strip().lower() in positions:
+                mapping[field] = positions[name.strip().lower()]
+                break
+        else:
+            if wanted:
+                raise InvalidStatement(f"No '{wanted}' column in the file.")
+
+    missing = [field for field in REQUIRED_COLUMNS if field not in mapping]
+    if missing:
+        raise InvalidStatement(f"Could not find a column for: {', '.join(missing)}.")
+    return mapping
+
+
+def parse_amount(value):
+    """
+    Signed amount of a statement cell: '₹1,234.50', 'Rs. 1,234.50' and 'INR 1234.50'
+    give 1234.50; '-1234.50' and '(1234.50)' give -1234.50.
+    """
+    text = NOT_AMOUNT.sub('', CURRENCY.sub('', value or ''))
+    negative = text.startswith('-') or (text.startswith('(') and text.endswith(')'))
+    digits = text.strip('()-')
+    if not digits or digits.startswith('.'):
+        raise ValueError(f"unrecognised amount '{value}'")
+    try:
+        amount = to_money(digits)
+    except InvalidOperation:
+        raise ValueError(f"unrecognised amount '{value}'")
+    # bulk_create would fail on an amount that does not fit in 64-bit paise
+    if not amount.is_finite() or amount > MAX_AMOUNT:
+        raise ValueError(f"amount '{value}' is too large")
+    return -amount if negative else amount
+
+
+def parse_when(value, date_format=None, tz=None):
+    value = (value or '').strip()
+    if not value:
+        return None
+    if date_format:
+        parsed = datetime.strptime(value, date_format)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"unrecognised date '{value}'")
+            parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tz)
+    return parsed
+
+
+def import_expenses(user, lines, columns=None, date_format=None, debits=DEBITS_POSITIVE,
+                    batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """
+    Import a CSV statement for `user` from `lines`, any iterable of text lines
+    (an open text file, or io.TextIOWrapper around an upload).
+
+    Rows are parsed as they are read and inserted with bulk_create_expenses in
+    batches of `batch_size`, so memory stays flat however long the file is and
+    rollups and caches are updated once per batch. Each batch commits on its
+    own; `progress(result)` is called after each one. Rows that cannot be
+    parsed are skipped and reported in the returned ImportResult.
+
+    `debits` says which sign the statement gives expenses (DEBITS_POSITIVE
+    or DEBITS_NEGATIVE); rows of the other sign are counted as credits and
+    not imported.
+    """
+    if debits not in DEBIT_SIGNS:
+        raise ValueError(f"debits must be one of {DEBIT_SIGNS}")
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise InvalidStatement("The file is empty.")
+    mapping = map_columns(header, columns)
+
+    # Statements repeat the same few dates over and over
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+    when_of = lru_cache(maxsize=4096)(lambda value: parse_when(value, date_format, tz))
+
+    result = ImportResult()
+    batch = []
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            values = {field: row[index] for field, index in mapping.items()}
+            amount = parse_amount(values['amount'])
+            if debits == DEBITS_NEGATIVE:
+                amount = -amount
+            if amount < 0:
+                result.credits += 1
+                continue
+            expense = Expense(
+                user_id=user.pk,
+                title=values['title'].strip()[:255],
+                amount=amount,
+                category=values.get('category', '').strip()[:50] or 'Uncategorized',
+                date_created=when_of(values.get('date_created')) or now,
+            )
+        except (IndexError, ValueError) as exc:
+            result.skip(reader.line_num, exc)
+            continue
+        if not expense.title:
+            result.skip(reader.line_num, "missing title")
+            continue
+
+        batch.append(expense)
+        if len(batch) >= batch_size:
+            flush(batch, result, progress)
+            batch = []
+    if batch:
+        flush(batch, result, progress)
+    return result
+
+
+def flush(batch, result, progress):
+    bulk_create_expenses(batch)
+    result.imported += len(batch)
+    if progress is not None:
+        progress(result)
@@ -0,0 +1,93 @@
+# expenses/jobs.py
+# DB-backed queue for PDF exports: export_pdf enqueues a ReportJob row and the
+# run_report_worker command claims and renders jobs, so no broker is needed.
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Expense, ReportJob
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job with no progress for this long belonged to a worker that died
+JOB_TIMEOUT = timedelta(seconds=getattr(settings, 'SPENDORA_REPORT_JOB_TIMEOUT', 15 * 60))
+# Pages are laid out far faster than this; stamping every one would be a write per page
+HEARTBEAT_INTERVAL = JOB_TIMEOUT / 10
+
+# Finished jobs, and the PDFs stored in them, are deleted after this long
+JOB_RETENTION = timedelta(days=getattr(settings, 'SPENDORA_REPORT_JOB_RETENTION_DAYS', 7))
+
+
+def enqueue_report(user):
+    return ReportJob.objects.create(user=user)
+
+
+def requeue_stale_jobs():
+    """Put RUNNING jobs whose worker stopped reporting back in the queue."""
+    stale = Q(heartbeat_at__lt=timezone.now() - JOB_TIMEOUT) | Q(heartbeat_at__isnull=True)
+    return ReportJob.objects.filter(stale, status=ReportJob.RUNNING).update(status=ReportJob.PENDING, progress=0)
+
+
+def prune_finished_jobs():
+    """Delete DONE and FAILED jobs that finished more than JOB_RETENTION ago; return how many."""
+    deleted, _ = ReportJob.objects.filter(
+        status__in=[ReportJob.DONE, ReportJob.FAILED], finished_at__lt=timezone.now() - JOB_RETENTION,
+    ).delete()
+    return deleted
+
+
+def claim_next_job():
+    """Mark the oldest pending job as running and return it, or None if the queue is empty."""
+    requeue_stale_jobs()
+    pending = ReportJob.objects.filter(status=ReportJob.PENDING).defer('pdf').order_by('created_at')
+    for job in pending[:10]:
+        # The conditional update is the lock: only one worker can move it out of PENDING
+        now = timezone.now()
+        if ReportJob.objects.filter(pk=job.pk, status=ReportJob.PENDING).update(status=ReportJob.RUNNING, heartbeat_at=now):
+            job.status = ReportJob.RUNNING
+            job.heartbeat_at = now
+            return job
+    return None
+
+
+def run_job(job):
+    from .reports import build_expense_pdf
+
+    beat = job.heartbeat_at or timezone.now()
+
+    def progress(percent):
+        nonlocal beat
+        beat = timezone.now()
+        ReportJob.objects.filter(pk=job.pk).update(progress=percent, heartbeat_at=beat)
+
+    def heartbeat():
+        # Keeps a long doc.build from looking like a dead worker to requeue_stale_jobs
+        nonlocal beat
+        if timezone.now() - beat >= HEARTBEAT_INTERVAL:
+            beat = timezone.now()
+            ReportJob.objects.filter(pk=job.pk).update(heartbeat_at=beat)
+
+    try:
+        expenses = Expense.objects.filter(user=job.user).order_by('-date_created')
+        buffer = build_expense_pdf(job.user.username, expenses, progress=progress, heartbeat=heartbeat)
+        job.pdf = buffer.getvalue()
+        job.status = ReportJob.DONE
+        job.progress = 100
+    except Exception as exc:
+        logger.exception("Report job %s failed", job.pk)
+        job.status = ReportJob.FAILED
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['pdf', 'status', 'progress', 'error', 'finished_at'])
+    return job
+
+
+def process_next_job():
+    """Run one queued job if there is one; return it (or None)."""
+    job = claim_next_job()
+    if job is not None:
+        run_job(job)
+    return job
@@ -0,0 +1,85 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from expenses.analytics import SpendAnalytics, load_columns
+from expenses.models import Expense
+
+from .benchmark_dashboard import CATEGORIES, Rollback
+
+
+class Command(BaseCommand):
+    help = (
+        "Time SpendAnalytics over a seeded history: the one column query, the "
+        "NumPy aggregation, and the same daily/weekday/monthly/category totals "
+        "done row by row in Python for comparison. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=3 * 365, help="Days of history to spread the rows over")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['days'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, days):
+        user = User.objects.create(username=f"bench-analytics-{random.random()}")
+        now = timezone.now()
+        seconds = days * 86400
+        start = time.perf_counter()
+        Expense.objects.bulk_create(
+            (
+                Expense(user=user, title=f"Expense {i}", amount=round(random.uniform(1, 2000), 2),
+                        category=random.choice(CATEGORIES),
+                        date_created=now - timedelta(seconds=random.randrange(seconds)))
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"seeded {rows:,} rows over {days} days in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        columns = load_columns(user)
+        load_s = time.perf_counter() - start
+        self.stdout.write(f"load_columns: {load_s * 1000:,.0f} ms "
+                          f"({sum(a.nbytes for a in columns[:3]) / 2 ** 20:.1f} MB of arrays)")
+
+        analytics = SpendAnalytics(*columns)
+        start = time.perf_counter()
+        data = analytics.as_dict()
+        numpy_s = time.perf_counter() - start
+        self.stdout.write(f"NumPy aggregation: {numpy_s * 1000:,.1f} ms "
+                          f"({len(data['months'])} months, {len(data['categories'])} categories)")
+
+        rows_iter = zip(columns[0].tolist(), columns[1].tolist(), columns[2].tolist())
+        start = time.perf_counter()
+        python_totals(rows_iter)
+        python_s = time.perf_counter() - start
+        self.stdout.write(f"Python loop (totals only): {python_s * 1000:,.1f} ms "
+                          f"-> {python_s / numpy_s:.1f}x the NumPy time")
+
+
+def python_totals(rows):
+    """The per-row dict version of SpendAnalytics' grouping, for comparison."""
+    daily, weekday, monthly, category, amounts = (
+        defaultdict(int), defaultdict(int), defaultdict(int), defaultdict(int), [],
+    )
+    for day, paise, code in rows:
+        daily[day] += paise
+        weekday[day.weekday()] += paise
+        monthly[(day.year, day.month)] += paise
+        category[code] += paise
+        amounts.append(paise)
+    amounts.sort()
+    return daily, weekday, monthly, category, amounts
@@ -0,0 +1,56 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import ExpenseBulkCreateAPI, ExpenseCreateAPI
+from expenses.models import Expense
+
+from .benchmark_dashboard import CATEGORIES, Rollback
+
+
+class Command(BaseCommand):
+    help = (
+        "Time creating N expenses through N ExpenseCreateAPI calls against one "
+        "ExpenseBulkCreateAPI call. Created rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['items'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, items):
+        user = User.objects.create(username=f"bench-bulk-{random.random()}")
+        payload = [
+            {'title': f"Expense {i}", 'amount': round(random.uniform(1, 2000), 2), 'category': random.choice(CATEGORIES)}
+            for i in range(items)
+        ]
+        factory = APIRequestFactory()
+
+        single = ExpenseCreateAPI.as_view()
+        start = time.perf_counter()
+        for item in payload:
+            request = factory.post('/api/expenses/create/', {**item, 'user': user.pk}, format='json')
+            force_authenticate(request, user=user)
+            assert single(request).status_code == 201
+        single_ms = (time.perf_counter() - start) * 1000
+
+        request = factory.post('/api/expenses/bulk/', payload, format='json')
+        force_authenticate(request, user=user)
+        start = time.perf_counter()
+        assert ExpenseBulkCreateAPI.as_view()(request).status_code == 201
+        bulk_ms = (time.perf_counter() - start) * 1000
+
+        assert Expense.objects.filter(user=user).count() == 2 * items
+        self.stdout.write(f"{items} single creates: {single_ms:.0f} ms ({single_ms / items:.2f} ms each)")
+        self.stdout.write(f"  one bulk create: {bulk_ms:.0f} ms ({single_ms / bulk_ms:.1f}x faster)")
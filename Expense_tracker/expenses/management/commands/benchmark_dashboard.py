@@ -0,0 +1,100 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from expenses.models import Expense, Wallet
+
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Education", "Other"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic expense history, then record EXPLAIN plans and latencies "
+        "for the dashboard queries with and without the Expense composite indexes. "
+        "Everything runs in a transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        # SQLite only allows schema changes inside a transaction with FK checks off
+        try:
+            with connection.constraint_checks_disabled(), transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        user, wallet = self.seed(options['rows'], options['users'], options['batch_size'])
+        queries = self.queries(user, wallet)
+
+        with connection.schema_editor() as editor:
+            for index in Expense._meta.indexes:
+                editor.remove_index(Expense, index)
+        self.report("before (FK indexes only)", queries, options['repeat'])
+
+        with connection.schema_editor() as editor:
+            for index in Expense._meta.indexes:
+                editor.add_index(Expense, index)
+        self.report("after (composite indexes)", queries, options['repeat'])
+
+    def seed(self, rows, users, batch_size):
+        self.stdout.write(f"Seeding {rows} expenses across {users} users...")
+        people = [User.objects.create(username=f"bench-{i}-{random.random()}") for i in range(users)]
+        wallet = Wallet.objects.create(name="Bench wallet", created_by=people[0])
+        now = timezone.now()
+
+        batch = []
+        for i in range(rows):
+            owner = people[i % users]
+            batch.append(Expense(
+                user=owner,
+                wallet=wallet if i % 10 == 0 else None,
+                title=f"Expense {i}",
+                amount=round(random.uniform(1, 2000), 2),
+                category=random.choice(CATEGORIES),
+                date_created=now - timedelta(minutes=random.randint(0, 3 * 365 * 24 * 60)),
+            ))
+            if len(batch) >= batch_size:
+                Expense.objects.bulk_create(batch)
+                batch = []
+        Expense.objects.bulk_create(batch)
+        return people[0], wallet
+
+    def queries(self, user, wallet):
+        expenses = Expense.objects.filter(user=user)
+        return {
+            "recent expenses": expenses.order_by('-date_created')[:10],
+            "last 6 months": expenses.filter(
+                date_created__gte=timezone.now() - timedelta(days=183)
+            ).values('date_created', 'amount'),
+            "category totals": expenses.values('category').annotate(total=Sum('amount')).order_by(),
+            "wallet feed": Expense.objects.filter(wallet=wallet).order_by('-date_created')[:50],
+        }
+
+    def report(self, label, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label}"))
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(f"\n{name}: median {timings[len(timings) // 2]:.2f} ms, best {timings[0]:.2f} ms")
+            self.stdout.write(queryset.explain())
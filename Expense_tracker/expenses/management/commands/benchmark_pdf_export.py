@@ -0,0 +1,72 @@
+import random
+import time
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expenses.models import Expense
+from expenses.reports import build_expense_pdf, category_pie
+
+from .benchmark_dashboard import CATEGORIES, Rollback
+
+
+def matplotlib_pie(category_totals):
+    """The previous chart: a matplotlib pie rasterized to PNG and embedded as an image."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image
+
+    plt.figure(figsize=(4,4))
+    plt.pie([float(value) for value in category_totals.values()], labels=category_totals.keys(), autopct='%1.1f%%', startangle=140)
+    plt.title("Expenses by Category")
+    chart_buffer = BytesIO()
+    plt.savefig(chart_buffer, format='PNG', bbox_inches='tight')
+    plt.close()
+    chart_buffer.seek(0)
+    return Image(chart_buffer, width=12*cm, height=12*cm)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare export_pdf latency and file size with the reportlab vector pie "
+        "against the old matplotlib PNG pie. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        user = User.objects.create(username=f"bench-pdf-{random.random()}")
+        Expense.objects.bulk_create([
+            Expense(user=user, title=f"Expense {i}", amount=round(random.uniform(1, 2000), 2),
+                    category=random.choice(CATEGORIES))
+            for i in range(rows)
+        ])
+        expenses = Expense.objects.filter(user=user).order_by('-date_created')
+
+        for name, chart in (("matplotlib PNG", matplotlib_pie), ("reportlab vector", category_pie)):
+            # First call pays one-off import costs; keep it out of the timings
+            build_expense_pdf(user.username, expenses, chart)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                size = len(build_expense_pdf(user.username, expenses, chart).getvalue())
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{name:>18}: median {timings[len(timings) // 2]:.1f} ms, "
+                f"best {timings[0]:.1f} ms, {size / 1024:.1f} KB"
+            )
@@ -0,0 +1,64 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from expenses.models import Expense
+from expenses.serializers import ExpenseReadSerializer, ExpenseSerializer
+
+from .benchmark_dashboard import CATEGORIES, Rollback
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list serialization throughput of ExpenseSerializer (model "
+        "instances) and ExpenseReadSerializer (.values() rows), and check both "
+        "render the same bytes. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes):
+        user = User.objects.create(username=f"bench-serializer-{random.random()}")
+        now = timezone.now()
+        Expense.objects.bulk_create(
+            (
+                Expense(user=user, title=f"Expense {i}", amount=round(random.uniform(1, 2000), 2),
+                        category=random.choice(CATEGORIES), date_created=now - timedelta(minutes=i))
+                for i in range(max(sizes))
+            ),
+            batch_size=5000,
+        )
+        renderer = JSONRenderer()
+
+        for size in sizes:
+            expenses = Expense.objects.filter(user=user).order_by('-date_created')[:size]
+
+            start = time.perf_counter()
+            slow = renderer.render(ExpenseSerializer(expenses, many=True).data)
+            slow_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            serializer = ExpenseReadSerializer()
+            fast = renderer.render(serializer.serialize(serializer.values(expenses)))
+            fast_s = time.perf_counter() - start
+
+            self.stdout.write(
+                f"{size:>7} rows: ModelSerializer {size / slow_s:>9,.0f} rows/s, "
+                f"values() {size / fast_s:>9,.0f} rows/s ({slow_s / fast_s:.1f}x), "
+                f"identical output: {fast == slow}"
+            )
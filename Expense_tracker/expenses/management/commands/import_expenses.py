@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.imports import DEBIT_SIGNS, DEBITS_POSITIVE, IMPORT_BATCH_SIZE, InvalidStatement, import_expenses
+
+
+class Command(BaseCommand):
+    help = "Import a CSV statement (or an export_csv file) into a user's expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help="Username to import for.")
+        parser.add_argument('path', help="CSV file to read.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--date-format', help="strptime format for the date column, e.g. %%d/%%m/%%Y.")
+        parser.add_argument('--debits', choices=DEBIT_SIGNS, default=DEBITS_POSITIVE,
+                            help="Sign of expense amounts; rows of the other sign are credits and are left out.")
+        for field in ('title', 'amount', 'category', 'date'):
+            parser.add_argument(f'--{field}-column', help=f"Header of the {field} column.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        columns = {
+            'title': options['title_column'],
+            'amount': options['amount_column'],
+            'category': options['category_column'],
+            'date_created': options['date_column'],
+        }
+        start = time.perf_counter()
+
+        def progress(result):
+            self.stdout.write(f"{result.imported} imported, {result.skipped} skipped ({time.perf_counter() - start:.1f}s)")
+
+        with open(options['path'], encoding='utf-8-sig', errors='replace', newline='') as lines:
+            try:
+                result = import_expenses(
+                    user, lines,
+                    columns=columns,
+                    date_format=options['date_format'],
+                    debits=options['debits'],
+                    batch_size=options['batch_size'],
+                    progress=progress,
+                )
+            except InvalidStatement as exc:
+                raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} expenses, skipped {result.skipped}, left out {result.credits} credits, "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
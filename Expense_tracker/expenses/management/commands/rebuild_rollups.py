@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses import rollups, stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ExpenseRollup and ExpenseStats tables from the Expense table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only rebuild this username's rows.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        count = rollups.rebuild(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup rows."))
+        count = stats.rebuild(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} stats rows."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from expenses.jobs import process_next_job, prune_finished_jobs
+
+# Seconds between sweeps of old finished jobs
+PRUNE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Process queued PDF report jobs. Runs until interrupted unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit.")
+
+    def handle(self, *args, **options):
+        pruned_at = None
+        while True:
+            if pruned_at is None or time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                deleted = prune_finished_jobs()
+                if deleted:
+                    self.stdout.write(f"Deleted {deleted} old report jobs")
+                pruned_at = time.monotonic()
+            job = process_next_job()
+            if job is not None:
+                self.stdout.write(f"Report job {job.pk}: {job.status}")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll'])
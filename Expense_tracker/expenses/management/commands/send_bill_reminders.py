@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from expenses.utils import REMINDER_BATCH_SIZE, send_bill_reminders
+
+
+class Command(BaseCommand):
+    help = "Email reminders for unpaid bills that are due soon. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REMINDER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = send_bill_reminders(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} bill reminders."))
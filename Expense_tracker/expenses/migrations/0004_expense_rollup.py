@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseRollup = apps.get_model('expenses', 'ExpenseRollup')
+    rows = (
+        Expense.objects
+        .annotate(month=TruncMonth('date_created'))
+        .values('user_id', 'wallet_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'), max_amount=Max('amount'))
+        .order_by()
+    )
+    ExpenseRollup.objects.bulk_create(
+        [
+            ExpenseRollup(
+                user_id=row['user_id'],
+                wallet_id=row['wallet_id'],
+                month=row['month'].date().replace(day=1),
+                category=row['category'],
+                total=row['total'],
+                count=row['count'],
+                max_amount=row['max_amount'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_budget'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('category', models.CharField(max_length=50)),
+                ('total', models.FloatField(default=0)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('max_amount', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to=settings.AUTH_USER_MODEL)),
+                ('wallet', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='expenses.wallet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'wallet', 'month', 'category'), name='unique_expense_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import F, Max, Min
+from django.db.models.functions import Round
+
+# Rows per UPDATE, so no single statement rewrites the whole table
+BATCH_SIZE = 10_000
+
+MONEY_COLUMNS = {
+    'Expense': ('amount',),
+    'ExpenseRollup': ('total', 'max_amount'),
+}
+
+
+def scale(apps, factor, rounding):
+    for model_name, fields in MONEY_COLUMNS.items():
+        model = apps.get_model('expenses', model_name)
+        bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            continue
+        for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+            model.objects.filter(pk__gte=start, pk__lt=start + BATCH_SIZE).update(
+                **{field: rounding(F(field) * factor) for field in fields}
+            )
+
+
+def to_minor_units(apps, schema_editor):
+    # Still float columns here: store whole paise, e.g. 12.34 -> 1234.0,
+    # so 0011 can change the column type without losing anything
+    scale(apps, 100, Round)
+
+
+def to_major_units(apps, schema_editor):
+    scale(apps, 0.01, lambda expression: expression)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0009_change_timestamps'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_minor_units, to_major_units),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:59
+
+import expenses.money
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0010_scale_amounts_to_minor_units'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='amount',
+            field=expenses.money.MoneyField(),
+        ),
+        migrations.AlterField(
+            model_name='expenserollup',
+            name='max_amount',
+            field=expenses.money.MoneyField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='expenserollup',
+            name='total',
+            field=expenses.money.MoneyField(default=0),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:14
+
+import math
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of the sketch bucketing in expenses.stats at the time of this migration
+SKETCH_ACCURACY = 0.02
+LOG_GAMMA = math.log((1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY))
+
+
+def bucket_of(amount):
+    if amount <= 0:
+        return '0'
+    return str(math.ceil(math.log(amount) / LOG_GAMMA))
+
+
+def backfill_stats(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseStats = apps.get_model('expenses', 'ExpenseStats')
+
+    groups = {}
+    rows = Expense.objects.values_list('user_id', 'category', 'amount').order_by().iterator(chunk_size=2000)
+    for user_id, category, amount in rows:
+        amount = float(amount)
+        bucket = bucket_of(amount)
+        for key in ((user_id, None), (user_id, category)):
+            stats = groups.setdefault(key, {'count': 0, 'mean': 0.0, 'm2': 0.0, 'sketch': {}})
+            # Welford's update
+            stats['count'] += 1
+            delta = amount - stats['mean']
+            stats['mean'] += delta / stats['count']
+            stats['m2'] += delta * (amount - stats['mean'])
+            stats['sketch'][bucket] = stats['sketch'].get(bucket, 0) + 1
+
+    ExpenseStats.objects.bulk_create(
+        [
+            ExpenseStats(user_id=user_id, category=category, **stats)
+            for (user_id, category), stats in groups.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0011_amount_minor_units'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'category'), name='unique_category_expense_stats'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user',), name='unique_overall_expense_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:27
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+
+def merge_duplicate_personal_rollups(apps, schema_editor):
+    # The old constraint let a personal bucket (wallet NULL) be created twice, after
+    # which every update went to both rows, so duplicated buckets are recounted
+    # from their expenses rather than summed
+    Expense = apps.get_model('expenses', 'Expense')
+    ExpenseRollup = apps.get_model('expenses', 'ExpenseRollup')
+    tz = timezone.get_current_timezone()
+    duplicates = (
+        ExpenseRollup.objects.filter(wallet__isnull=True)
+        .values('user_id', 'month', 'category')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for key in list(duplicates):
+        month = key['month']
+        following = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        figures = Expense.objects.filter(
+            user_id=key['user_id'],
+            wallet__isnull=True,
+            category=key['category'],
+            date_created__gte=timezone.make_aware(datetime(month.year, month.month, 1), tz),
+            date_created__lt=timezone.make_aware(datetime(following.year, following.month, 1), tz),
+        ).aggregate(total=Sum('amount'), count=Count('id'), max_amount=Max('amount'))
+
+        rollups = ExpenseRollup.objects.filter(
+            user_id=key['user_id'], wallet__isnull=True, month=month, category=key['category'],
+        ).order_by('id')
+        keep = rollups.first()
+        rollups.exclude(pk=keep.pk).delete()
+        if not figures['count']:
+            keep.delete()
+            continue
+        keep.total, keep.count, keep.max_amount = figures['total'], figures['count'], figures['max_amount']
+        keep.save(update_fields=['total', 'count', 'max_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0012_expense_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_personal_rollups, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='expenserollup',
+            name='unique_expense_rollup',
+        ),
+        migrations.AddConstraint(
+            model_name='expenserollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('wallet__isnull', False)), fields=('user', 'wallet', 'month', 'category'), name='unique_wallet_expense_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='expenserollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('wallet__isnull', True)), fields=('user', 'month', 'category'), name='unique_personal_expense_rollup'),
+        ),
+    ]
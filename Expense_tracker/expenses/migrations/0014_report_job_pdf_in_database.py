@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+def copy_report_files(apps, schema_editor):
+    # Finished reports move into the row when their file is on this disk;
+    # the rest were written on another machine and have to be exported again
+    ReportJob = apps.get_model('expenses', 'ReportJob')
+    for job in ReportJob.objects.filter(status='done').exclude(file='').iterator():
+        if job.file.storage.exists(job.file.name):
+            with job.file.open('rb') as pdf:
+                job.pdf = pdf.read()
+            job.save(update_fields=['pdf'])
+        else:
+            job.status = 'failed'
+            job.error = "The report file is no longer available. Please export again."
+            job.save(update_fields=['status', 'error'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0013_rollup_null_wallet_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reportjob',
+            name='pdf',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_report_files, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='reportjob',
+            name='file',
+        ),
+    ]
@@ -1,8 +1,10 @@
 # expenses/models.py
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .money import MoneyField
+
 
 class Wallet(models.Model):
     name = models.CharField(max_length=100)
@@ -17,13 +19,132 @@ class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, null=True, blank=True)
     title = models.CharField(max_length=255)
-    amount = models.FloatField()
+    amount = MoneyField()
     category = models.CharField(max_length=50, default="Uncategorized")
     date_created = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "date_created"], name="expense_user_date_idx"),
+            models.Index(fields=["user", "category"], name="expense_user_category_idx"),
+            models.Index(
+                fields=["wallet", "date_created"],
+                name="expense_wallet_date_idx",
+                condition=models.Q(wallet__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Keep the row and its rollup update (post_save) in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class ExpenseRollup(models.Model):
+    """Per (user, wallet, month, category) totals, maintained by expenses.signals."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expense_rollups")
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, null=True, blank=True)
+    month = models.DateField()
+    category = models.CharField(max_length=50)
+    total = MoneyField(default=0)
+    count = models.PositiveIntegerField(default=0)
+    max_amount = MoneyField(default=0)
+
+    class Meta:
+        # NULLs are distinct in a plain unique constraint, so personal buckets (no wallet) get their own
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "wallet", "month", "category"], name="unique_wallet_expense_rollup",
+                condition=models.Q(wallet__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=["user", "month", "category"], name="unique_personal_expense_rollup",
+                condition=models.Q(wallet__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.month:%b %Y} {self.category}: {self.total}"
+
+
+class ExpenseStats(models.Model):
+    """
+    Running statistics of a user's expense amounts, per category and across
+    all categories (category is null), maintained by expenses.signals.
+
+    mean and m2 (the sum of squared deviations from the mean) are Welford's
+    running moments, in rupees; sketch maps log-spaced amount buckets to
+    counts for approximate quantiles (see expenses.stats).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expense_stats")
+    category = models.CharField(max_length=50, null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    sketch = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category"], name="unique_category_expense_stats",
+                condition=models.Q(category__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=["user"], name="unique_overall_expense_stats",
+                condition=models.Q(category__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.category or 'all categories'}: {self.count} expenses"
+
+
+class DataVersion(models.Model):
+    """Counter bumped on every write to a user's expenses, budgets or wallets."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="data_version")
+    version = models.PositiveBigIntegerField(default=1)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.user} v{self.version}"
+
+
+class ReportJob(models.Model):
+    """A queued PDF export, picked up by the run_report_worker command."""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="report_jobs")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    # The PDF itself: the worker and the web service may not share a disk
+    pdf = models.BinaryField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when claimed and on every progress update; a RUNNING job that goes quiet is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="reportjob_status_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Report {self.pk} for {self.user} ({self.status})"
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -34,4 +155,22 @@ class Budget(models.Model):
     icon = models.CharField(max_length=50, default='bi-wallet2')
 
     def __str__(self):
-        return f"{self.category} - {self.amount}"
\ No newline at end of file
+        return f"{self.category} - {self.amount}"
+
+
+class Bill(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bills")
+    title = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    due_date = models.DateField()
+    paid = models.BooleanField(default=False)
+    # Due date the last reminder was sent for; reminders go out once per due date
+    reminded_for = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["paid", "due_date"], name="bill_paid_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.amount}"
@@ -0,0 +1,78 @@
+# expenses/money.py
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django import forms
+from django.core import exceptions, validators
+from django.db import models
+from django.utils.functional import cached_property
+
+# Minor units (paise) per rupee
+MINOR_UNITS = 100
+CENT = Decimal('0.01')
+
+# Largest amount a signed 64-bit count of paise can hold
+MAX_AMOUNT = (Decimal(2 ** 63 - 1) / MINOR_UNITS).quantize(CENT)
+
+
+def to_money(value):
+    """`value` (Decimal, int, float or numeric string) as a Decimal rounded to the paisa."""
+    if isinstance(value, float):
+        # str() gives the shortest repr, so 0.1 + 0.2 becomes 0.30 and not 0.30000000000000004
+        value = str(value)
+    return Decimal(value).quantize(CENT, ROUND_HALF_UP)
+
+
+def to_minor(value):
+    return int(to_money(value) * MINOR_UNITS)
+
+
+def from_minor(value):
+    return (Decimal(value) / MINOR_UNITS).quantize(CENT)
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    An amount of money, stored as a 64-bit integer count of minor units.
+
+    Python code sees a two-place Decimal; the database sees whole paise, so
+    SUM/MAX run on exact integers. Aggregates over the field come back
+    through from_db_value as Decimals too. Expressions that put a Python
+    amount into SQL must declare it, e.g. Value(amount, output_field=MoneyField()),
+    so it is converted to paise.
+    """
+    description = "Amount of money stored in minor units"
+    max_digits = 19
+    decimal_places = 2
+
+    @cached_property
+    def validators(self):
+        return [
+            *self._validators,
+            validators.MinValueValidator(-MAX_AMOUNT),
+            validators.MaxValueValidator(MAX_AMOUNT),
+        ]
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else from_minor(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        try:
+            return to_money(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                "“%(value)s” value must be an amount of money.", code='invalid', params={'value': value},
+            )
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        return None if value is None else to_minor(self.to_python(value))
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'max_digits': self.max_digits,
+            'decimal_places': self.decimal_places,
+            **kwargs,
+        })
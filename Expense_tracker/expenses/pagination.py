@@ -0,0 +1,44 @@
+# expenses/pagination.py
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(expense):
+    raw = f"{expense.date_created.isoformat()}|{expense.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (date_created, id) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        date_part, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return datetime.fromisoformat(date_part), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, size=PAGE_SIZE):
+    """
+    One page of `queryset` newest first, keyed on (date_created, id).
+
+    Each page starts strictly after the cursor's row instead of using an
+    OFFSET, so it costs O(size) on the (user, date_created) index at any depth.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by('-date_created', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        date_created, pk = position
+        queryset = queryset.filter(
+            Q(date_created__lt=date_created) | Q(date_created=date_created, id__lt=pk)
+        )
+
+    rows = list(queryset[:size + 1])
+    next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+    return rows[:size], next_cursor
@@ -0,0 +1,122 @@
+# expenses/reports.py
+# PDF stack for export_pdf. reportlab is heavy to import, so views import this
+# module on first use instead of at worker start-up.
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+PIE_COLORS = ["#4f46e5", "#06b6d4", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#ec4899", "#64748b"]
+
+
+def category_pie(category_totals):
+    """Vector pie chart of spend per category, drawn with reportlab graphics."""
+    size = 12*cm
+    drawing = Drawing(size, size)
+    drawing.add(String(size / 2, size - 14, "Expenses by Category", fontName='Helvetica-Bold', fontSize=12, textAnchor='middle'))
+
+    total = sum(category_totals.values()) or 1
+    pie = Pie()
+    pie.x = pie.y = 2.5*cm
+    pie.width = pie.height = 7*cm
+    # reportlab does float arithmetic on the slice values
+    pie.data = [float(value) for value in category_totals.values()]
+    pie.labels = [f"{name} ({value / total:.1%})" for name, value in category_totals.items()]
+    pie.startAngle = 140
+    pie.direction = 'anticlockwise'
+    pie.sideLabels = True
+    pie.simpleLabels = False
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    pie.slices.fontSize = 8
+    for i in range(len(pie.data)):
+        pie.slices[i].fillColor = colors.HexColor(PIE_COLORS[i % len(PIE_COLORS)])
+    drawing.add(pie)
+    return drawing
+
+
+def build_expense_pdf(username, expenses, chart=category_pie, progress=None, heartbeat=None):
+    """
+    Render the expense report for `expenses` and return it as a BytesIO.
+
+    `chart` turns a {category: total} dict into a flowable for the report.
+    `progress`, if given, is called with a 0-100 percentage as rows are laid out.
+    `heartbeat`, if given, is called once per page while the document is built,
+    the slow part of a long report.
+    """
+    expenses = list(expenses)
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=100, bottomMargin=50, leftMargin=50, rightMargin=50)
+    elements = []
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'title',
+        parent=styles['Heading1'],
+        fontSize=24,
+        alignment=1,  # center
+        textColor=colors.HexColor("#4f46e5"),
+        spaceAfter=10
+    )
+    subtitle_style = ParagraphStyle(
+        'subtitle',
+        parent=styles['Normal'],
+        fontSize=12,
+        alignment=1,
+        textColor=colors.grey,
+        spaceAfter=20
+    )
+    
+    elements.append(Paragraph("Spendora – My Expense Tracker", title_style))
+    elements.append(Paragraph(f"Report for: {username}", subtitle_style))
+    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%d %b %Y, %H:%M')}", subtitle_style))
+    
+    total_amount = sum([exp.amount for exp in expenses])
+    elements.append(Paragraph(f"<b>Total Expenses:</b> ₹{total_amount:.2f}", styles['Normal']))
+    elements.append(Spacer(1, 0.5*cm))
+    
+    data = [['Title', 'Category', 'Amount (₹)', 'Date']]
+    category_totals = {}
+    step = max(len(expenses) // 20, 1)
+    for i, exp in enumerate(expenses, 1):
+        if progress and i % step == 0:
+            progress(i * 90 // len(expenses))
+        data.append([exp.title, exp.category, f"{exp.amount:.2f}", exp.date_created.strftime('%d %b %Y')])
+        category_totals[exp.category] = category_totals.get(exp.category, 0) + exp.amount
+    
+    table = Table(data, colWidths=[7*cm, 4*cm, 3*cm, 4*cm])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#4f46e5")),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 12),
+        ('BOTTOMPADDING', (0,0), (-1,0), 8),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.lightgrey, colors.whitesmoke]),
+    ]))
+    
+    elements.append(table)
+    elements.append(Spacer(1, 1*cm))
+    
+    if category_totals:
+        elements.append(chart(category_totals))
+    
+    def add_page_number(canvas, doc):
+        page_num = canvas.getPageNumber()
+        text = f"Page {page_num}"
+        canvas.setFont('Helvetica', 10)
+        canvas.drawRightString(A4[0] - 50, 20, text)
+        if heartbeat:
+            heartbeat()
+    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
+    if progress:
+        progress(100)
+    buffer.seek(0)
+    return buffer
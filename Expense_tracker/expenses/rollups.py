@@ -0,0 +1,130 @@
+# expenses/rollups.py
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import Greatest, TruncMonth
+from django.utils import timezone
+
+from .models import Expense, ExpenseRollup
+from .money import MoneyField, to_money
+
+
+def month_of(value):
+    """First day of the month `value` falls in, in the current time zone."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+def bucket_key(user_id, wallet_id, date_created, category):
+    return {
+        'user_id': user_id,
+        'wallet_id': wallet_id,
+        'month': month_of(date_created),
+        'category': category,
+    }
+
+
+def add(key, amount, count=1, max_amount=None):
+    """Add `count` expenses summing to `amount` to the bucket for `key`."""
+    amount = to_money(amount)
+    max_amount = amount if max_amount is None else to_money(max_amount)
+    updated = ExpenseRollup.objects.filter(**key).update(
+        total=F('total') + Value(amount, output_field=MoneyField()),
+        count=F('count') + count,
+        max_amount=Greatest('max_amount', Value(max_amount, output_field=MoneyField())),
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            ExpenseRollup.objects.create(total=amount, count=count, max_amount=max_amount, **key)
+    except IntegrityError:
+        # Another writer created the bucket first
+        add(key, amount, count, max_amount)
+
+
+def remove(key, amount):
+    """Take one expense of `amount` out of the bucket for `key`."""
+    amount = to_money(amount)
+    rollup = ExpenseRollup.objects.select_for_update().filter(**key).first()
+    if rollup is None:
+        return
+    if rollup.count <= 1:
+        rollup.delete()
+        return
+
+    rollup.total -= amount
+    rollup.count -= 1
+    if amount >= rollup.max_amount:
+        rollup.max_amount = bucket_expenses(key).aggregate(m=Max('amount'))['m'] or 0
+    rollup.save(update_fields=['total', 'count', 'max_amount'])
+
+
+def bucket_expenses(key):
+    start = key['month']
+    end = start + relativedelta(months=1)
+    tz = timezone.get_current_timezone()
+    return Expense.objects.filter(
+        user_id=key['user_id'],
+        wallet_id=key['wallet_id'],
+        category=key['category'],
+        date_created__gte=timezone.make_aware(datetime(start.year, start.month, 1), tz),
+        date_created__lt=timezone.make_aware(datetime(end.year, end.month, 1), tz),
+    )
+
+
+@transaction.atomic
+def rebuild(user=None):
+    """Recompute rollups from the Expense table, for one user or everyone."""
+    rollups = ExpenseRollup.objects.all()
+    expenses = Expense.objects.all()
+    if user is not None:
+        rollups = rollups.filter(user=user)
+        expenses = expenses.filter(user=user)
+    rollups.delete()
+
+    rows = (
+        expenses
+        .annotate(month=TruncMonth('date_created'))
+        .values('user_id', 'wallet_id', 'month', 'category')
+        .annotate(total=Sum('amount'), count=Count('id'), max_amount=Max('amount'))
+        .order_by()
+    )
+    created = ExpenseRollup.objects.bulk_create(
+        [
+            ExpenseRollup(
+                user_id=row['user_id'],
+                wallet_id=row['wallet_id'],
+                month=month_of(row['month']),
+                category=row['category'],
+                total=row['total'],
+                count=row['count'],
+                max_amount=row['max_amount'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+    return len(created)
+
+
+def add_expenses(expenses):
+    """
+    Fold freshly inserted expenses (e.g. from bulk_create, which sends no
+    signals) into their rollups with one add() per bucket rather than per row.
+    """
+    buckets = {}
+    for expense in expenses:
+        bucket = (expense.user_id, expense.wallet_id, month_of(expense.date_created), expense.category)
+        amount = to_money(expense.amount)
+        total, count, max_amount = buckets.get(bucket, (0, 0, amount))
+        buckets[bucket] = (total + amount, count + 1, max(max_amount, amount))
+    for (user_id, wallet_id, month, category), (total, count, max_amount) in buckets.items():
+        add(
+            {'user_id': user_id, 'wallet_id': wallet_id, 'month': month, 'category': category},
+            total, count, max_amount,
+        )
+    return len(buckets)
@@ -1,8 +1,78 @@
-from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import Expense
+from .money import MoneyField
+
+
+class MoneySerializerField(serializers.DecimalField):
+    """Amounts go out as JSON numbers, as they did when Expense.amount was a float."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('coerce_to_string', False)
+        super().__init__(**kwargs)
+
 
 class ExpenseSerializer(serializers.ModelSerializer):
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        MoneyField: MoneySerializerField,
+    }
+
     class Meta:
         model = Expense
         fields = '__all__'
-        
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # Optional sparse fieldset, e.g. fields=['id', 'title', 'amount']
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ExpenseReadSerializer:
+    """
+    Read-only twin of ExpenseSerializer for list responses.
+
+    Rows come from .values() instead of model instances, and each column is
+    converted by a plain function picked once per call from the matching
+    ExpenseSerializer field, so the rendered JSON is byte for byte the same
+    without DRF's per-row, per-field machinery.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = ExpenseSerializer(fields=fields).fields
+
+    def values(self, queryset, *extra):
+        """The .values() rows serialize() reads, plus any `extra` columns (e.g. for a cursor)."""
+        return queryset.values(*dict.fromkeys([*self.fields, *extra]))
+
+    def serialize(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = [(name, converter(field, tz)) for name, field in self.fields.items()]
+        return [
+            {name: None if row[name] is None else convert(row[name]) for name, convert in converters}
+            for row in rows
+        ]
+
+
+def converter(field, tz):
+    """A function equivalent to field.to_representation for the plain values .values() returns."""
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        # .values() already yields the related primary key
+        return lambda value: value
+    if type(field) is serializers.DateTimeField and tz is not None and not hasattr(field, 'timezone') \
+            and getattr(field, 'format', api_settings.DATETIME_FORMAT) == ISO_8601:
+        def iso_datetime(value):
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return iso_datetime
+    return {
+        # JSONRenderer writes Decimals with float() anyway
+        MoneySerializerField: float,
+        serializers.FloatField: float,
+        serializers.IntegerField: int,
+        serializers.CharField: str,
+    }.get(type(field), field.to_representation)
@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import rollups, stats
+from .cache import bump_data_version
+from .models import Budget, Expense, Wallet
+from .money import to_money
+
+ROLLUP_FIELDS = ('user_id', 'wallet_id', 'date_created', 'category', 'amount')
+
+
+def rollup_key(values):
+    return rollups.bucket_key(values['user_id'], values['wallet_id'], values['date_created'], values['category'])
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_bucket(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._rollup_previous = Expense.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+
+@receiver(post_save, sender=Expense)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        rollups.remove(rollup_key(previous), previous['amount'])
+        if previous['user_id'] != instance.user_id:
+            bump_data_version(previous['user_id'])
+    rollups.add(rollup_key({field: getattr(instance, field) for field in ROLLUP_FIELDS}), instance.amount)
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollups.remove(rollup_key({field: getattr(instance, field) for field in ROLLUP_FIELDS}), instance.amount)
+    bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=Expense)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.user_id, instance.category, to_money(instance.amount))
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        before = (previous['user_id'], previous['category'], previous['amount'])
+        if before == current:
+            return
+        stats.remove(*before)
+    stats.add(*current)
+
+
+@receiver(post_delete, sender=Expense)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.remove(instance.user_id, instance.category, instance.amount)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def budget_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_data_version(instance.user_id)
+
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def wallet_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_data_version(instance.created_by_id)
+
+
+@receiver(m2m_changed, sender=Wallet.members.through)
+def wallet_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove'):
+        return
+    user_ids = [instance.pk] if reverse else pk_set
+    for user_id in user_ids:
+        bump_data_version(user_id)
@@ -0,0 +1,205 @@
+# expenses/stats.py
+import math
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import Expense, ExpenseStats
+
+# Relative error of the quantile sketch: a reported quantile is within 2% of
+# a real amount, and a user's whole range of amounts fits in a few hundred buckets
+SKETCH_ACCURACY = 0.02
+GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# An expense is unusual once it is this many standard deviations above the
+# mean, or above this percentile, of at least ALERT_MIN_EXPENSES earlier ones
+ALERT_Z_SCORE = getattr(settings, 'SPENDORA_ALERT_Z_SCORE', 3.0)
+ALERT_PERCENTILE = getattr(settings, 'SPENDORA_ALERT_PERCENTILE', 99)
+ALERT_MIN_EXPENSES = getattr(settings, 'SPENDORA_ALERT_MIN_EXPENSES', 10)
+
+
+def bucket_of(amount):
+    """Sketch bucket for `amount`; JSON object keys are strings."""
+    if amount <= 0:
+        return '0'
+    return str(math.ceil(math.log(amount) / LOG_GAMMA))
+
+
+def bucket_value(bucket):
+    """The amount a bucket stands for, within SKETCH_ACCURACY of all its members."""
+    return 0.0 if bucket == '0' else 2 * GAMMA ** int(bucket) / (GAMMA + 1)
+
+
+def quantile(sketch, q):
+    """Approximate `q` quantile (0 to 1) of the amounts counted in `sketch`."""
+    buckets = sorted(sketch.items(), key=lambda item: bucket_value(item[0]))
+    rank = q * (sum(sketch.values()) - 1)
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen > rank:
+            return bucket_value(bucket)
+    return None
+
+
+def summarize(amounts):
+    """(count, mean, m2, sketch) of a batch of amounts."""
+    amounts = [float(amount) for amount in amounts]
+    count = len(amounts)
+    mean = sum(amounts) / count
+    sketch = {}
+    for amount in amounts:
+        bucket = bucket_of(amount)
+        sketch[bucket] = sketch.get(bucket, 0) + 1
+    return count, mean, sum((amount - mean) ** 2 for amount in amounts), sketch
+
+
+def combine(stats, count, mean, m2, sketch):
+    """
+    Merge a batch summary into `stats` in place (Chan et al.'s parallel form
+    of Welford's update). A negative count takes the batch back out, which is
+    how edits and deletes are undone without rescanning.
+    """
+    total = stats.count + count
+    if total <= 0:
+        stats.count, stats.mean, stats.m2, stats.sketch = 0, 0.0, 0.0, {}
+        return stats
+    delta = mean - stats.mean
+    stats.mean += delta * count / total
+    stats.m2 = max(stats.m2 + m2 + delta * delta * stats.count * count / total, 0.0)
+    stats.count = total
+    merged = dict(stats.sketch)
+    for bucket, n in sketch.items():
+        n += merged.get(bucket, 0)
+        if n > 0:
+            merged[bucket] = n
+        else:
+            merged.pop(bucket, None)
+    stats.sketch = merged
+    return stats
+
+
+def fold(user_id, category, count, mean, m2, sketch):
+    """Merge a batch summary into the stored stats for (user, category)."""
+    with transaction.atomic():
+        stats = ExpenseStats.objects.select_for_update().filter(user_id=user_id, category=category).first()
+        if stats is None:
+            if count <= 0:
+                return
+            try:
+                with transaction.atomic():
+                    ExpenseStats.objects.create(
+                        user_id=user_id, category=category, count=count, mean=mean, m2=m2, sketch=sketch,
+                    )
+                return
+            except IntegrityError:
+                # Another writer created the row first
+                return fold(user_id, category, count, mean, m2, sketch)
+        combine(stats, count, mean, m2, sketch)
+        if stats.count:
+            stats.save(update_fields=['count', 'mean', 'm2', 'sketch'])
+        else:
+            stats.delete()
+
+
+def add(user_id, category, amount):
+    """Count one expense of `amount` in the user's overall and category stats: two row updates."""
+    batch = summarize([amount])
+    for key in (None, category):
+        fold(user_id, key, *batch)
+
+
+def remove(user_id, category, amount):
+    count, mean, m2, sketch = summarize([amount])
+    for key in (None, category):
+        fold(user_id, key, -count, mean, m2, {bucket: -n for bucket, n in sketch.items()})
+
+
+def add_expenses(expenses):
+    """
+    Fold freshly inserted expenses (e.g. from bulk_create, which sends no
+    signals) into their stats with one update per (user, category).
+    """
+    groups = {}
+    for expense in expenses:
+        groups.setdefault((expense.user_id, None), []).append(expense.amount)
+        groups.setdefault((expense.user_id, expense.category), []).append(expense.amount)
+    for (user_id, category), amounts in groups.items():
+        fold(user_id, category, *summarize(amounts))
+    return len(groups)
+
+
+def group_stats(rows):
+    """Unsaved ExpenseStats for (user_id, category, amount) rows, in one streaming pass."""
+    groups = {}
+    for user_id, category, amount in rows:
+        amount = float(amount)
+        bucket = bucket_of(amount)
+        for key in ((user_id, None), (user_id, category)):
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = ExpenseStats(user_id=key[0], category=key[1], sketch={})
+            # Welford's update
+            stats.count += 1
+            delta = amount - stats.mean
+            stats.mean += delta / stats.count
+            stats.m2 += delta * (amount - stats.mean)
+            stats.sketch[bucket] = stats.sketch.get(bucket, 0) + 1
+    return list(groups.values())
+
+
+@transaction.atomic
+def rebuild(user=None):
+    """Recompute stats from the Expense table, for one user or everyone."""
+    stats = ExpenseStats.objects.all()
+    expenses = Expense.objects.all()
+    if user is not None:
+        stats = stats.filter(user=user)
+        expenses = expenses.filter(user=user)
+    stats.delete()
+
+    rows = expenses.values_list('user_id', 'category', 'amount').order_by().iterator(chunk_size=2000)
+    return len(ExpenseStats.objects.bulk_create(group_stats(rows), batch_size=1000))
+
+
+def without(stats, amount):
+    """A copy of `stats` with one expense of `amount` taken back out."""
+    copy = ExpenseStats(count=stats.count, mean=stats.mean, m2=stats.m2, sketch=stats.sketch)
+    count, mean, m2, sketch = summarize([amount])
+    return combine(copy, -count, mean, m2, {bucket: -n for bucket, n in sketch.items()})
+
+
+def unusual(expense):
+    """
+    Why `expense` stands out against the user's earlier expenses, or None.
+
+    Compares it with the user's stats for its category, or with all their
+    expenses while the category has too little history, using two stored
+    rows rather than the history itself.
+    """
+    rows = {
+        stats.category: stats
+        for stats in ExpenseStats.objects.filter(
+            Q(category=expense.category) | Q(category__isnull=True), user_id=expense.user_id,
+        )
+    }
+    amount = float(expense.amount)
+    for category in (expense.category, None):
+        if category not in rows:
+            continue
+        earlier = without(rows[category], amount)
+        if earlier.count < ALERT_MIN_EXPENSES:
+            continue
+        scope = f"{category} expenses" if category else "expenses"
+
+        deviation = math.sqrt(earlier.m2 / (earlier.count - 1))
+        if deviation and (amount - earlier.mean) / deviation >= ALERT_Z_SCORE:
+            z = (amount - earlier.mean) / deviation
+            return f"{z:.1f} standard deviations above your average of ₹{earlier.mean:.2f} for {scope}"
+        threshold = quantile(earlier.sketch, ALERT_PERCENTILE / 100)
+        if threshold is not None and amount > threshold * (1 + SKETCH_ACCURACY):
+            return f"more than {ALERT_PERCENTILE}% of your {scope}"
+        return None
+    return None
@@ -0,0 +1,81 @@
+# expenses/summary.py
+from dateutil.relativedelta import relativedelta
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .models import ExpenseRollup
+
+
+class SpendSummary:
+    """
+    Spend figures for one user, computed from a single grouped query.
+
+    The user's ExpenseRollup rows are grouped by (category, month), which
+    yields at most months x categories rows however long the history is;
+    every figure the pages need (totals, count, average, max, current month,
+    per-category totals and the 6-month series) is then folded together in
+    Python from those rows.
+    """
+
+    MONTHS = 6
+
+    def __init__(self, user):
+        self.user = user
+        self.today = timezone.localdate()
+        self._load()
+
+    def _load(self):
+        rows = (
+            ExpenseRollup.objects.filter(user=self.user)
+            .values('category', 'month')
+            .annotate(total=Sum('total'), count=Sum('count'), max_amount=Max('max_amount'))
+            .order_by()
+        )
+
+        current = (self.today.year, self.today.month)
+        by_category = {}
+        by_month = {}
+        self.total_expense = 0
+        self.total_items = 0
+        self.max_expense = 0
+        self.monthly_expense = 0
+
+        for row in rows:
+            key = (row['month'].year, row['month'].month)
+            by_category[row['category']] = by_category.get(row['category'], 0) + row['total']
+            by_month[key] = by_month.get(key, 0) + row['total']
+            self.total_expense += row['total']
+            self.total_items += row['count']
+            self.max_expense = max(self.max_expense, row['max_amount'])
+            if key == current:
+                self.monthly_expense += row['total']
+
+        self.avg_expense = round(self.total_expense / self.total_items, 2) if self.total_items else 0
+        self.categories = sorted(by_category)
+        self.category_totals = [by_category[c] for c in self.categories]
+        self.total_categories = len(self.categories)
+
+        self.ranked_categories = sorted(by_category.items(), key=lambda item: item[1], reverse=True)
+        self.top_categories = self.ranked_categories[:3]
+
+        self.months = []
+        self.monthly_totals = []
+        for i in range(self.MONTHS - 1, -1, -1):
+            month_date = self.today - relativedelta(months=i)
+            self.months.append(month_date.strftime('%b %Y'))
+            self.monthly_totals.append(by_month.get((month_date.year, month_date.month), 0))
+
+    def as_context(self):
+        return {
+            'total_expense': self.total_expense,
+            'total_items': self.total_items,
+            'avg_expense': self.avg_expense,
+            'max_expense': self.max_expense,
+            'monthly_expense': self.monthly_expense,
+            'total_categories': self.total_categories,
+            'categories': self.categories,
+            'category_totals': self.category_totals,
+            'top_categories': self.top_categories,
+            'months': self.months,
+            'monthly_totals': self.monthly_totals,
+        }
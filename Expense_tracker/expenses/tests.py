@@ -1,3 +1,884 @@
-from django.test import TestCase
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from budget.models import Insight
+
+from . import rollups, stats
+from .budgets import budget_progress
+from .form import ExpenseForm
+from .analytics import SpendAnalytics
+from .cache import data_version, get_cache
+from .bulk import bulk_create_expenses
+from .imports import import_expenses
+from .jobs import JOB_RETENTION, JOB_TIMEOUT, claim_next_job, run_job
+from .models import Bill, Budget, Expense, ExpenseRollup, ExpenseStats, ReportJob, Wallet
+from .pagination import keyset_page
+from .serializers import ExpenseReadSerializer, ExpenseSerializer
+from .summary import SpendSummary
+from .utils import send_bill_reminders
+from .wallets import is_wallet_member, wallet_summary
+
+
+class SpendSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+
+    def add_expenses(self, categories, per_category=2):
+        for cat in categories:
+            for i in range(per_category):
+                Expense.objects.create(user=self.user, title=f'{cat} {i}', amount=10 * (i + 1), category=cat)
+
+    def test_figures(self):
+        self.add_expenses(['Food', 'Bills'])
+        with self.assertNumQueries(1):
+            summary = SpendSummary(self.user)
+
+        self.assertEqual(summary.total_expense, 60)
+        self.assertEqual(summary.total_items, 4)
+        self.assertEqual(summary.avg_expense, 15)
+        self.assertEqual(summary.max_expense, 20)
+        self.assertEqual(summary.monthly_expense, 60)
+        self.assertEqual(summary.categories, ['Bills', 'Food'])
+        self.assertEqual(summary.category_totals, [30, 30])
+        self.assertEqual(summary.monthly_totals[-1], 60)
+        self.assertEqual(len(summary.months), 6)
+
+    def test_empty(self):
+        summary = SpendSummary(self.user)
+        self.assertEqual(summary.total_expense, 0)
+        self.assertEqual(summary.avg_expense, 0)
+        self.assertEqual(summary.categories, [])
+        self.assertEqual(summary.monthly_totals, [0] * 6)
+
+
+class SummaryViewQueryCountTests(TestCase):
+    # session + user lookups, the data version (cached pages), the summary
+    # query, and whatever rows the page lists
+    expected = {'dashboard': 6, 'profile': 4, 'add_expense': 3, 'view_expenses': 4}
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+
+    def count_queries(self, name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_categories(self):
+        Expense.objects.create(user=self.user, title='Lunch', amount=12, category='Food')
+        few = {name: self.count_queries(name) for name in self.expected}
+        self.assertEqual(few, self.expected)
+
+        for i in range(50):
+            Expense.objects.create(user=self.user, title=f'Item {i}', amount=i + 1, category=f'Category {i}')
+        many = {name: self.count_queries(name) for name in self.expected}
+        self.assertEqual(many, self.expected)
+
+
+class ExpenseRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.jan = timezone.make_aware(datetime(2025, 1, 15))
+        self.feb = timezone.make_aware(datetime(2025, 2, 10))
+
+    def buckets(self):
+        return sorted(
+            ExpenseRollup.objects.filter(user=self.user)
+            .values_list('month', 'category', 'total', 'count', 'max_amount')
+        )
+
+    def test_create_update_delete(self):
+        lunch = Expense.objects.create(user=self.user, title='Lunch', amount=12, category='Food', date_created=self.jan)
+        Expense.objects.create(user=self.user, title='Dinner', amount=30, category='Food', date_created=self.jan)
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), 'Food', 42, 2, 30)])
+
+        lunch.category = 'Bills'
+        lunch.date_created = self.feb
+        lunch.save()
+        self.assertEqual(self.buckets(), [
+            (date(2025, 1, 1), 'Food', 30, 1, 30),
+            (date(2025, 2, 1), 'Bills', 12, 1, 12),
+        ])
+
+        lunch.delete()
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), 'Food', 30, 1, 30)])
+
+    def test_max_recomputed_when_largest_removed(self):
+        Expense.objects.create(user=self.user, title='Small', amount=5, category='Food', date_created=self.jan)
+        big = Expense.objects.create(user=self.user, title='Big', amount=50, category='Food', date_created=self.jan)
+        big.amount = 8
+        big.save()
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), 'Food', 13, 2, 8)])
+
+    def test_rebuild_matches_incremental(self):
+        for i in range(6):
+            Expense.objects.create(
+                user=self.user, title=f'Item {i}', amount=i + 1,
+                category='Food' if i % 2 else 'Bills',
+                date_created=self.jan if i < 3 else self.feb,
+            )
+        incremental = self.buckets()
+        ExpenseRollup.objects.all().delete()
+        rollups.rebuild(self.user)
+        self.assertEqual(self.buckets(), incremental)
+
+    def test_personal_bucket_is_unique(self):
+        # A plain unique constraint would accept both rows, since NULL wallets compare distinct
+        key = {'user': self.user, 'wallet': None, 'month': date(2025, 1, 1), 'category': 'Food'}
+        ExpenseRollup.objects.create(**key)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ExpenseRollup.objects.create(**key)
+
+        # add() then updates that single row
+        rollups.add({'user_id': self.user.pk, 'wallet_id': None, 'month': date(2025, 1, 1), 'category': 'Food'}, 12)
+        self.assertEqual(self.buckets(), [(date(2025, 1, 1), 'Food', 12, 1, 12)])
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+
+    def test_writes_bump_version(self):
+        versions = [data_version(self.user.pk)]
+        expense = Expense.objects.create(user=self.user, title='Lunch', amount=12)
+        versions.append(data_version(self.user.pk))
+        expense.delete()
+        versions.append(data_version(self.user.pk))
+        Budget.objects.create(user=self.user, category='Food', amount=100)
+        versions.append(data_version(self.user.pk))
+        wallet = Wallet.objects.create(name='Trip', created_by=self.user)
+        versions.append(data_version(self.user.pk))
+        other = User.objects.create_user(username='ravi', password='pass12345')
+        wallet.members.add(other)
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(data_version(other.pk), 1)
+
+    def test_cached_dashboard_is_never_stale(self):
+        Expense.objects.create(user=self.user, title='Lunch', amount=12)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['total_expense'], 12)
+
+        # Second hit is served from cache: only session, user, data version and insights
+        with self.assertNumQueries(4):
+            self.client.get(reverse('dashboard'))
+
+        Expense.objects.create(user=self.user, title='Dinner', amount=30)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['total_expense'], 42)
+
+    def test_new_insights_keep_the_cache(self):
+        self.client.get(reverse('dashboard'))
+        version = data_version(self.user.pk)
+        Insight.objects.create(user=self.user, message='Highest spending category: Food')
+        self.assertEqual(data_version(self.user.pk), version)
+        self.assertEqual(len(self.client.get(reverse('dashboard')).context['insights']), 1)
+
+    def test_cached_dashboard_follows_the_month(self):
+        today = timezone.localdate()
+        Expense.objects.create(user=self.user, title='Lunch', amount=12)
+        self.assertEqual(self.client.get(reverse('dashboard')).context['monthly_expense'], 12)
+
+        next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=next_month):
+            self.assertEqual(self.client.get(reverse('dashboard')).context['monthly_expense'], 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+        same_time = timezone.now()
+        for i in range(7):
+            # Several rows share a timestamp, so the id tie-breaker matters
+            Expense.objects.create(user=self.user, title=f'Item {i}', amount=i + 1,
+                                   date_created=same_time - timedelta(days=i // 3))
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = keyset_page(Expense.objects.filter(user=self.user), cursor, size=3)
+            seen.extend(row.pk for row in rows)
+            if cursor is None:
+                break
+        expected = list(Expense.objects.filter(user=self.user)
+                        .order_by('-date_created', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_bad_cursor_starts_from_first_page(self):
+        rows, _ = keyset_page(Expense.objects.filter(user=self.user), 'not-a-cursor', size=3)
+        self.assertEqual(len(rows), 3)
+
+    def test_load_more_fragment(self):
+        _, cursor = keyset_page(Expense.objects.filter(user=self.user), size=5)
+        response = self.client.get(reverse('view_expenses_more'), {'cursor': cursor})
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['html'].count('<tr '), 2)
+
+
+class ExportCsvTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_csv'), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_filters_are_applied(self):
+        Expense.objects.create(user=self.user, title='Old lunch', amount=5, category='Food',
+                               date_created=timezone.make_aware(datetime(2024, 12, 31, 23)))
+        Expense.objects.create(user=self.user, title='Lunch', amount=12, category='Food',
+                               date_created=timezone.make_aware(datetime(2025, 1, 15)))
+        Expense.objects.create(user=self.user, title='Rent', amount=500, category='Bills',
+                               date_created=timezone.make_aware(datetime(2025, 1, 31, 22)))
+
+        self.assertEqual(len(self.export()), 4)
+        lines = self.export(start='2025-01-01', end='2025-01-31')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['Rent', 'Lunch'])
+        lines = self.export(category='Food', start='not-a-date')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['Lunch', 'Old lunch'])
+        self.assertEqual(len(self.export(wallet='²')), 4)
+
+    def peak_memory(self, rows):
+        user = User.objects.create_user(username=f'user{rows}', password='pass12345')
+        self.client.force_login(user)
+        Expense.objects.bulk_create(
+            (Expense(user=user, title=f'Item {i}', amount=i % 500, category='Food') for i in range(rows)),
+            batch_size=5000,
+        )
+        tracemalloc.start()
+        try:
+            response = self.client.get(reverse('export_csv'))
+            count = sum(1 for _ in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(count, rows + 1)
+        return peak
+
+    def test_peak_memory_is_flat(self):
+        small = self.peak_memory(10_000)
+        large = self.peak_memory(100_000)
+        self.assertLess(large, small * 1.5)
+
+
+class ImportCostTests(TestCase):
+    def test_startup_does_not_import_heavy_libraries(self):
+        script = (
+            "import sys, django\n"
+            "django.setup()\n"
+            "from django.urls import get_resolver, resolve\n"
+            "get_resolver().url_patterns\n"
+            "resolve('/export/pdf/')\n"
+            "resolve('/analytics/data/')\n"
+            "resolve('/api/expenses/forecast/')\n"
+            "print(','.join(m for m in ('matplotlib', 'reportlab', 'numpy') if m in sys.modules))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'expense_tracker.settings'},
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '')
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+        Expense.objects.create(user=self.user, title='Lunch', amount=12, category='Food')
+
+    def test_export_is_queued_then_rendered_by_worker(self):
+        response = self.client.post(reverse('export_pdf'))
+        job = ReportJob.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('report_job', args=[job.id]))
+        self.assertEqual(job.status, ReportJob.PENDING)
+
+        status = self.client.get(reverse('report_job_status', args=[job.id])).json()
+        self.assertEqual(status['status'], 'pending')
+        self.assertIsNone(status['download_url'])
+
+        call_command('run_report_worker', once=True, stdout=StringIO())
+
+        status = self.client.get(reverse('report_job_status', args=[job.id])).json()
+        self.assertEqual((status['status'], status['progress']), ('done', 100))
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_jobs_are_private(self):
+        job = ReportJob.objects.create(user=self.user)
+        other = User.objects.create_user(username='ravi', password='pass12345')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('report_job_status', args=[job.id])).status_code, 404)
+
+    def test_job_is_claimed_once(self):
+        job = ReportJob.objects.create(user=self.user)
+        self.assertEqual(claim_next_job().pk, job.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_download_needs_no_shared_disk(self):
+        job = ReportJob.objects.create(user=self.user, status=ReportJob.DONE, pdf=b'%PDF-1.4 stored in the row')
+        response = self.client.get(reverse('report_job_download', args=[job.id]))
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 stored in the row')
+
+    def test_jobs_of_a_dead_worker_are_requeued(self):
+        job = ReportJob.objects.create(user=self.user)
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+        # Still reporting: left alone
+        self.assertIsNone(claim_next_job())
+
+        ReportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - JOB_TIMEOUT - timedelta(seconds=1))
+        self.assertEqual(claim_next_job().pk, job.pk)
+
+    def test_heartbeat_continues_while_pages_are_built(self):
+        Expense.objects.bulk_create(Expense(user=self.user, title=f'Item {i}', amount=1) for i in range(120))
+        ReportJob.objects.create(user=self.user)
+        job = claim_next_job()
+
+        # afterPage runs after each page is drawn: record the job's stamp there
+        stamps = []
+        def after_page(doc):
+            stamps.append(ReportJob.objects.values_list('heartbeat_at', flat=True).get(pk=job.pk))
+
+        with mock.patch('expenses.jobs.HEARTBEAT_INTERVAL', timedelta(0)), \
+                mock.patch('reportlab.platypus.SimpleDocTemplate.afterPage', after_page):
+            run_job(job)
+
+        # Every row is laid out before doc.build draws the pages, which still stamp the job
+        self.assertGreater(len(stamps), 1)
+        self.assertGreater(stamps[-1], stamps[0])
+
+    def test_worker_prunes_old_finished_jobs(self):
+        old = timezone.now() - JOB_RETENTION - timedelta(hours=1)
+        ReportJob.objects.create(user=self.user, status=ReportJob.DONE, pdf=b'%PDF', finished_at=old)
+        ReportJob.objects.create(user=self.user, status=ReportJob.FAILED, finished_at=old)
+        recent = ReportJob.objects.create(user=self.user, status=ReportJob.DONE, pdf=b'%PDF', finished_at=timezone.now())
+
+        out = StringIO()
+        call_command('run_report_worker', once=True, stdout=out)
+        self.assertEqual(list(ReportJob.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertIn('Deleted 2 old report jobs', out.getvalue())
+
+
+class BillReminderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', email='asha@example.com', password='pass12345')
+        self.today = timezone.now().date()
+
+    def test_batched_delivery_is_idempotent(self):
+        Bill.objects.bulk_create([
+            Bill(user=self.user, title=f'Bill {i}', amount=100, due_date=self.today + timedelta(days=i % 3))
+            for i in range(1000)
+        ])
+        Bill.objects.create(user=self.user, title='Far off', amount=10, due_date=self.today + timedelta(days=30))
+        Bill.objects.create(user=self.user, title='Paid', amount=10, due_date=self.today, paid=True)
+
+        # One SELECT with the users joined in, then one UPDATE per batch of 100
+        start = time.perf_counter()
+        with self.assertNumQueries(11):
+            sent = send_bill_reminders(batch_size=100)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sent, 1000)
+        self.assertEqual(len(mail.outbox), 1000)
+        self.assertIn('Bill 0', mail.outbox[0].subject)
+        self.assertLess(elapsed, 5)
+
+        self.assertEqual(send_bill_reminders(), 0)
+        self.assertEqual(len(mail.outbox), 1000)
+
+    def test_moved_due_date_is_reminded_again(self):
+        bill = Bill.objects.create(user=self.user, title='Rent', amount=500, due_date=self.today)
+        self.assertEqual(send_bill_reminders(), 1)
+        bill.due_date = self.today + timedelta(days=1)
+        bill.save()
+        self.assertEqual(send_bill_reminders(), 1)
+
+
+class BudgetProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+
+    def test_spent_and_colors(self):
+        Budget.objects.create(user=self.user, category='Food', amount=Decimal('100.00'))
+        Budget.objects.create(user=self.user, category='Bills', amount=Decimal('1000.00'))
+        Budget.objects.create(user=self.user, category='Travel', amount=Decimal('50.00'))
+        Expense.objects.create(user=self.user, title='Lunch', amount=60.5, category='Food')
+        Expense.objects.create(user=self.user, title='Dinner', amount=35, category='Food')
+        Expense.objects.create(user=self.user, title='Rent', amount=750, category='Bills')
+
+        with self.assertNumQueries(1):
+            budgets = {b['category']: b for b in budget_progress(self.user)}
+
+        self.assertEqual(budgets['Food']['spent'], Decimal('95.50'))
+        self.assertEqual(budgets['Food']['remaining'], Decimal('4.50'))
+        self.assertEqual(budgets['Food']['color'], 'danger')
+        self.assertEqual(budgets['Bills']['color'], 'warning')
+        self.assertEqual(budgets['Travel']['spent'], 0)
+        self.assertEqual(budgets['Travel']['color'], 'primary')
+
+    def test_query_count_independent_of_budgets(self):
+        def count():
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(reverse('budgets')).status_code, 200)
+            return len(ctx.captured_queries)
+
+        Budget.objects.create(user=self.user, category='Food', amount=100)
+        few = count()
+        for i in range(20):
+            Budget.objects.create(user=self.user, category=f'Category {i}', amount=100)
+            Expense.objects.create(user=self.user, title='Item', amount=10, category=f'Category {i}')
+        # session + user, then the budgets with their spending
+        self.assertEqual(few, 3)
+        self.assertEqual(count(), few)
+
+
+class WalletPageTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='asha', password='pass12345')
+        self.friend = User.objects.create_user(username='ravi', password='pass12345')
+        self.idle = User.objects.create_user(username='zara', password='pass12345')
+        self.wallet = Wallet.objects.create(name='Trip', created_by=self.owner)
+        self.wallet.members.add(self.owner, self.friend, self.idle)
+        Expense.objects.create(user=self.owner, wallet=self.wallet, title='Hotel', amount=300, category='Stay')
+        Expense.objects.create(user=self.friend, wallet=self.wallet, title='Cab', amount=40, category='Transport')
+        Expense.objects.create(user=self.friend, wallet=self.wallet, title='Train', amount=60, category='Transport')
+        # Personal spending stays out of the wallet figures
+        Expense.objects.create(user=self.friend, title='Groceries', amount=25, category='Food')
+        self.client.force_login(self.owner)
+
+    def test_summary(self):
+        with self.assertNumQueries(2):
+            summary = wallet_summary(self.wallet)
+        self.assertEqual(summary['member_contrib'], [('asha', 300), ('ravi', 100), ('zara', 0)])
+        self.assertEqual(summary['category_contrib'], [('Stay', 300), ('Transport', 100)])
+        self.assertEqual(summary['total_expense'], 400)
+
+    def test_non_member_is_redirected(self):
+        outsider = User.objects.create_user(username='omar', password='pass12345')
+        self.client.force_login(outsider)
+        for name in ('wallet-dashboard', 'wallet-detail'):
+            self.assertRedirects(self.client.get(reverse(name, args=[self.wallet.id])), reverse('wallet-list'))
+
+    def test_query_count_independent_of_members_and_categories(self):
+        def count(name):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(reverse(name, args=[self.wallet.id])).status_code, 200)
+            return len(ctx.captured_queries)
+
+        few = {name: count(name) for name in ('wallet-dashboard', 'wallet-detail')}
+        for i in range(15):
+            member = User.objects.create(username=f'member{i}')
+            self.wallet.members.add(member)
+            Expense.objects.create(user=member, wallet=self.wallet, title='Item', amount=5, category=f'Category {i}')
+        many = {name: count(name) for name in ('wallet-dashboard', 'wallet-detail')}
+        self.assertEqual(few, many)
+
+    def test_membership_is_memoized_per_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.owner
+        with self.assertNumQueries(1):
+            self.assertTrue(is_wallet_member(request, self.wallet.id))
+            self.assertTrue(is_wallet_member(request, str(self.wallet.id)))
+
+    def test_add_wallet_expense_requires_membership(self):
+        outsider = User.objects.create_user(username='omar', password='pass12345')
+        self.client.force_login(outsider)
+        response = self.client.post(reverse('add-wallet-expense', args=[self.wallet.id]),
+                                    {'title': 'Sneaky', 'amount': 5, 'category': 'Food'})
+        self.assertRedirects(response, reverse('wallet-list'))
+        self.assertFalse(Expense.objects.filter(title='Sneaky').exists())
+
+
+class WalletMembersTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='asha', password='pass12345')
+        self.friends = [User.objects.create(username=f'friend{i}') for i in range(10)]
+        self.client.force_login(self.owner)
+
+    def test_create_wallet_adds_members_in_bulk(self):
+        ids = [str(u.id) for u in self.friends]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('wallet-create'), {'name': 'Flat', 'members': ids})
+        inserts = [q for q in ctx.captured_queries
+                   if q['sql'].startswith('INSERT') and 'INTO "expenses_wallet_members"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertRedirects(response, reverse('wallet-list'))
+        wallet = Wallet.objects.get(name='Flat')
+        self.assertEqual(wallet.members.count(), 11)
+
+    def test_invalid_ids_are_reported_together(self):
+        response = self.client.post(reverse('wallet-create'),
+                                    {'name': 'Flat', 'members': [self.friends[0].id, 9998, 'abc', 9999]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Wallet.objects.filter(name='Flat').exists())
+        message = str(list(response.context['messages'])[0])
+        for bad in ('9998', 'abc', '9999'):
+            self.assertIn(bad, message)
+
+    def test_add_members_to_existing_wallet(self):
+        wallet = Wallet.objects.create(name='Trip', created_by=self.owner)
+        wallet.members.add(self.owner, self.friends[0])
+        before = data_version(self.friends[1].pk)
+        response = self.client.post(reverse('add-wallet-members', args=[wallet.id]),
+                                    {'members': [self.friends[0].id, self.friends[1].id]})
+        self.assertRedirects(response, reverse('wallet-detail', args=[wallet.id]), fetch_redirect_response=False)
+        self.assertEqual(wallet.members.count(), 3)
+        self.assertGreater(data_version(self.friends[1].pk), before)
+
+
+class CsvImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='imran', password='pass12345')
+        self.client.force_login(self.user)
+
+    def upload(self, content, **fields):
+        upload = SimpleUploadedFile('statement.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('import_expenses'), {'file': upload, **fields}, follow=True)
+
+    def test_export_round_trips(self):
+        source = User.objects.create_user(username='source', password='pass12345')
+        for i, category in enumerate(['Food', 'Bills', 'Food, drinks']):
+            Expense.objects.create(user=source, title=f'Item "{i}"', amount=10.5 * (i + 1), category=category,
+                                   date_created=timezone.make_aware(datetime(2025, 3, i + 1, 9, 30)))
+        self.client.force_login(source)
+        exported = b''.join(self.client.get(reverse('export_csv')).streaming_content).decode()
+
+        self.client.force_login(self.user)
+        self.upload(exported)
+        fields = ('title', 'amount', 'category', 'date_created')
+        self.assertEqual(
+            list(Expense.objects.filter(user=self.user).order_by('date_created').values_list(*fields)),
+            list(Expense.objects.filter(user=source).order_by('date_created').values_list(*fields)),
+        )
+        self.assertEqual(SpendSummary(self.user).total_expense, SpendSummary(source).total_expense)
+
+    def test_bank_statement_columns_and_bad_rows(self):
+        response = self.upload(
+            "Txn Date,Narration,Withdrawal,Balance\n"
+            "05/02/2025,Grocery,\"-1,250.00\",9000\n"
+            "06/02/2025,Taxi,(80.50),8919.50\n"
+            "31/02/2025,Bad date,-10,0\n"
+            "07/02/2025,No amount,,0\n",
+            date_column='Txn Date', date_format='%d/%m/%Y', debits='negative',
+        )
+        rows = list(Expense.objects.filter(user=self.user).order_by('date_created').values_list('title', 'amount', 'category'))
+        self.assertEqual(rows, [('Grocery', 1250.0, 'Uncategorized'), ('Taxi', 80.5, 'Uncategorized')])
+        self.assertEqual(timezone.localtime(Expense.objects.get(title='Taxi').date_created).date(), date(2025, 2, 6))
+        warning = [str(m) for m in get_messages(response.wsgi_request)][-1]
+        self.assertTrue(warning.startswith('Skipped 2 rows. Line 4:'), warning)
+
+    def test_currency_markers_and_credits(self):
+        response = self.upload(
+            "Date,Description,Amount\n"
+            "2025-02-01,Groceries,Rs. 500\n"
+            "2025-02-02,Fuel,INR 1500.50\n"
+            "2025-02-03,Tea,₹20\n"
+            "2025-02-04,Refund,-Rs. 300\n"
+            "2025-02-05,Salary,(50000)\n"
+            "2025-02-06,Garbled,Rs.\n"
+        )
+        rows = list(Expense.objects.filter(user=self.user).order_by('date_created').values_list('title', 'amount'))
+        self.assertEqual(rows, [('Groceries', Decimal('500.00')), ('Fuel', Decimal('1500.50')), ('Tea', Decimal('20.00'))])
+        notes = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn('Left out 2 credit rows (refunds, income).', notes)
+        self.assertTrue(notes[-1].startswith('Skipped 1 rows. Line 7:'), notes)
+
+    def test_oversized_amounts_are_skipped(self):
+        lines = ["Title,Amount", "Lunch,120", "huge,100000000000000000", "Tea,20"]
+        result = import_expenses(self.user, lines, batch_size=1)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(result.skipped, 1)
+        self.assertTrue(result.errors[0].startswith('Line 3:'), result.errors)
+        self.assertEqual(sorted(Expense.objects.filter(user=self.user).values_list('title', flat=True)), ['Lunch', 'Tea'])
+
+    def test_unknown_columns_are_reported(self):
+        response = self.upload("When,What\n2025-01-01,Lunch\n")
+        self.assertContains(response, 'Could not find a column for: title, amount')
+        self.assertFalse(Expense.objects.exists())
+
+    def test_batches_update_rollups_once_each(self):
+        lines = ["Title,Amount,Category,Date"] + [f"Item {i},{i + 1},Food,2025-0{i % 2 + 1}-10" for i in range(7)]
+        batches = []
+        version = data_version(self.user.pk)
+        result = import_expenses(self.user, lines, batch_size=3, progress=lambda r: batches.append(r.imported))
+
+        self.assertEqual(result.imported, 7)
+        self.assertEqual(batches, [3, 6, 7])
+        self.assertEqual(data_version(self.user.pk), version + 3)
+        self.assertEqual(
+            list(ExpenseRollup.objects.filter(user=self.user).order_by('month').values_list('count', 'total', 'max_amount')),
+            [(4, 16.0, 7.0), (3, 12.0, 6.0)],
+        )
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.client.force_login(self.user)
+        Expense.objects.create(user=self.user, title='Lunch', amount=12)
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        # session, user and the data version: nothing the page itself needs
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+        expense = Expense.objects.get(title='Lunch')
+        expense.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_html_pages_are_not_conditional(self):
+        # The page carries a CSRF token, which a 304 would leave stale after re-login
+        response = self.client.get(reverse('dashboard'))
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_expense_list_api(self):
+        self.assert_revalidates(reverse('expenses'))
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get(reverse('expenses'))['ETag']
+        other = User.objects.create_user(username='ravi', password='pass12345')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('expenses'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_updated_at_tracks_edits(self):
+        expense = Expense.objects.get(title='Lunch')
+        created = expense.updated_at
+        expense.amount = 15
+        expense.save()
+        self.assertGreater(expense.updated_at, created)
+
+
+class ExpenseReadSerializerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        wallet = Wallet.objects.create(name='Trip', created_by=self.user)
+        Expense.objects.create(user=self.user, title='Lunch', amount=12, category='Food',
+                               date_created=timezone.make_aware(datetime(2025, 1, 15, 13, 5, 7, 123456)))
+        Expense.objects.create(user=self.user, wallet=wallet, title='Taxi "late"', amount=0.1 + 0.2)
+
+    def render(self, fields=None):
+        expenses = Expense.objects.order_by('id')
+        fast = ExpenseReadSerializer(fields=fields)
+        return (
+            JSONRenderer().render(ExpenseSerializer(expenses, many=True, fields=fields).data),
+            JSONRenderer().render(fast.serialize(fast.values(expenses))),
+        )
+
+    def test_output_is_byte_identical(self):
+        for tz in ('UTC', 'Asia/Kolkata'):
+            with timezone.override(tz):
+                slow, fast = self.render()
+                self.assertEqual(fast, slow)
+        slow, fast = self.render(fields=['title', 'wallet', 'updated_at'])
+        self.assertEqual(fast, slow)
+
+
+class MoneyFieldTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+
+    def test_stored_as_integer_paise(self):
+        expense = Expense.objects.create(user=self.user, title='Tea', amount=0.1 + 0.2)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT amount FROM expenses_expense WHERE id = %s", [expense.pk])
+            self.assertEqual(cursor.fetchone()[0], 30)
+        self.assertEqual(Expense.objects.get(pk=expense.pk).amount, Decimal('0.30'))
+
+    def test_sums_are_exact(self):
+        for _ in range(10):
+            Expense.objects.create(user=self.user, title='Tea', amount='0.10', category='Food')
+        total = Expense.objects.aggregate(total=Sum('amount'))['total']
+        self.assertEqual(total, Decimal('1.00'))
+        self.assertEqual(SpendSummary(self.user).total_expense, Decimal('1.00'))
+        self.assertEqual(ExpenseRollup.objects.get(user=self.user).max_amount, Decimal('0.10'))
+
+    def test_budget_spent_is_decimal(self):
+        Budget.objects.create(user=self.user, category='Food', amount=Decimal('1.00'))
+        Expense.objects.create(user=self.user, title='Tea', amount='0.35', category='Food')
+        progress = budget_progress(self.user)[0]
+        self.assertEqual(progress['spent'], Decimal('0.35'))
+        self.assertEqual(progress['remaining'], Decimal('0.65'))
+
+    def test_form_and_api_accept_two_places(self):
+        form = ExpenseForm(data={'title': 'Tea', 'amount': '12.345', 'category': 'Food', 'date_created': '2025-01-01'})
+        self.assertIn('amount', form.errors)
+        data = ExpenseSerializer(Expense(user=self.user, title='Tea', amount=Decimal('12.50'))).data
+        self.assertEqual(JSONRenderer().render({'amount': data['amount']}), b'{"amount":12.5}')
+
+
+class SpendAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.today = date(2024, 3, 31)
+
+    def add(self, amount, category, day):
+        Expense.objects.create(
+            user=self.user, title='x', amount=amount, category=category,
+            date_created=timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=12)),
+        )
+
+    def test_figures_match_row_by_row_totals(self):
+        self.add('100.50', 'Food', date(2024, 1, 15))   # Monday
+        self.add('50.25', 'Travel', date(2024, 2, 10))  # Saturday
+        self.add('200', 'Food', date(2024, 3, 30))      # Saturday
+        self.add('30', 'Bills', date(2024, 3, 31))      # Sunday
+        self.add('5', 'Bills', date(2023, 1, 1))        # Outside the daily series
+
+        data = SpendAnalytics.for_user(self.user, self.today).as_dict()
+
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(data['days'][-1], '2024-03-31')
+        self.assertEqual(data['daily'][-2:], [200.0, 30.0])
+        self.assertEqual(data['rolling_7'][-1], round(230 / 7, 2))
+        self.assertEqual(data['rolling_30'][-1], round(230 / 30, 2))
+        self.assertEqual(data['percentiles']['p50'], 50.25)
+
+        weekdays = {d['day']: d for d in data['weekdays']}
+        self.assertEqual(weekdays['Sat']['total'], 250.25)
+        self.assertEqual(weekdays['Sat']['count'], 2)
+        self.assertEqual(weekdays['Mon']['total'], 100.5)
+        self.assertEqual(weekdays['Sun']['total'], 35.0)
+
+        months = {m['month']: m for m in data['months']}
+        self.assertEqual(len(months), 15)
+        self.assertEqual(months['2024-01']['change'], 100.5)
+        self.assertIsNone(months['2024-01']['change_percent'])
+        self.assertEqual(months['2024-02']['change'], -50.25)
+        self.assertEqual(months['2024-02']['change_percent'], -50.0)
+        self.assertEqual(months['2024-03']['total'], 230.0)
+
+        self.assertEqual([c['category'] for c in data['categories']], ['Food', 'Travel', 'Bills'])
+        self.assertEqual(data['categories'][0]['total'], 300.5)
+        self.assertEqual(sum(c['total'] for c in data['categories']), 385.75)
+
+    def test_no_expenses(self):
+        self.assertEqual(SpendAnalytics.for_user(self.user, self.today).as_dict(), {'count': 0})
+
+    def test_json_view_is_cached_per_data_version(self):
+        self.client.force_login(self.user)
+        self.add('100', 'Food', timezone.localdate())
+        url = reverse('analytics_data')
+
+        self.assertEqual(self.client.get(url).json()['count'], 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).json()['count'], 1)
+        self.assertFalse(any('expenses_expense' in q['sql'] for q in queries.captured_queries))
+
+        self.add('20', 'Bills', timezone.localdate())
+        self.assertEqual(self.client.get(url).json()['count'], 2)
+
+
+class ExpenseStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+
+    def assertMatchesRebuild(self):
+        live = {
+            row.category: (row.count, round(row.mean, 6), round(row.m2, 4), row.sketch)
+            for row in ExpenseStats.objects.filter(user=self.user)
+        }
+        stats.rebuild(self.user)
+        rebuilt = {
+            row.category: (row.count, round(row.mean, 6), round(row.m2, 4), row.sketch)
+            for row in ExpenseStats.objects.filter(user=self.user)
+        }
+        self.assertEqual(live, rebuilt)
+
+    def test_saves_edits_and_deletes_keep_stats_exact(self):
+        food = [Expense.objects.create(user=self.user, title='x', amount=a, category='Food') for a in (10, 20, 45.5)]
+        Expense.objects.create(user=self.user, title='x', amount=300, category='Bills')
+
+        overall = ExpenseStats.objects.get(user=self.user, category=None)
+        amounts = [10, 20, 45.5, 300]
+        self.assertEqual(overall.count, 4)
+        self.assertAlmostEqual(overall.mean, statistics.mean(amounts))
+        self.assertAlmostEqual(overall.m2 / (overall.count - 1), statistics.variance(amounts))
+
+        food[0].amount = 12
+        food[0].save()
+        food[1].category = 'Bills'
+        food[1].save()
+        food[2].delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(ExpenseStats.objects.get(user=self.user, category='Food').count, 1)
+
+        bulk_create_expenses([Expense(user=self.user, title='x', amount=a, category='Food') for a in (5, 7, 9)])
+        self.assertMatchesRebuild()
+
+        Expense.objects.filter(user=self.user, category='Food').delete()
+        self.assertFalse(ExpenseStats.objects.filter(user=self.user, category='Food').exists())
+        self.assertMatchesRebuild()
+
+    def test_quantiles_are_within_sketch_accuracy(self):
+        amounts = [round(1.07 ** i, 2) for i in range(200)]
+        sketch = stats.summarize(amounts)[3]
+        for q in (0.5, 0.9, 0.99):
+            exact = sorted(amounts)[int(q * (len(amounts) - 1))]
+            self.assertAlmostEqual(stats.quantile(sketch, q), exact, delta=exact * stats.SKETCH_ACCURACY)
+
+    def test_unusual_compares_with_earlier_expenses(self):
+        for i in range(20):
+            Expense.objects.create(user=self.user, title='x', amount=2000 + 10 * (i % 5), category='Rent')
+        usual = Expense.objects.create(user=self.user, title='x', amount=2030, category='Rent')
+        self.assertIsNone(stats.unusual(usual))
+
+        spike = Expense.objects.create(user=self.user, title='x', amount=2500, category='Rent')
+        self.assertIn('standard deviations above', stats.unusual(spike))
+
+        # A new category is judged against all the user's expenses
+        first = Expense.objects.create(user=self.user, title='x', amount=9000, category='Travel')
+        self.assertIn('for expenses', stats.unusual(first))
+
+    def test_needs_enough_history(self):
+        for amount in (10, 12, 11):
+            Expense.objects.create(user=self.user, title='x', amount=amount, category='Food')
+        spike = Expense.objects.create(user=self.user, title='x', amount=5000, category='Food')
+        self.assertIsNone(stats.unusual(spike))
@@ -44,6 +44,8 @@ urlpatterns = [
     # Expense
     path('add-expense/', views.add_expense, name='add_expense'),
     path('view-expenses/', views.view_expenses, name='view_expenses'),
+    path('view-expenses/more/', views.view_expenses_more, name='view_expenses_more'),
+    path('import-expenses/', views.import_expenses, name='import_expenses'),
     path('edit-expense/<int:expense_id>/', views.edit_expense, name='edit_expense'),
     path('delete-expense/<int:expense_id>/', views.delete_expense, name='delete_expense'),
 
@@ -53,12 +55,17 @@ urlpatterns = [
     path("wallet/<int:pk>/", views.wallet_detail, name="wallet-detail"), 
     path('wallets/<int:wallet_id>/dashboard/', views.wallet_dashboard, name='wallet-dashboard'),
     path('wallets/<int:wallet_id>/add-expense/', views.add_wallet_expense, name='add-wallet-expense'),
+    path('wallets/<int:wallet_id>/add-members/', views.add_members, name='add-wallet-members'),
     path('wallet-help/', views.wallet_help, name='wallet-help'),
     path('expense-help/',views.expense_help, name='expense-help'),
     path('export/csv/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
+    path('export/jobs/<int:job_id>/', views.report_job, name='report_job'),
+    path('export/jobs/<int:job_id>/status/', views.report_job_status, name='report_job_status'),
+    path('export/jobs/<int:job_id>/download/', views.report_job_download, name='report_job_download'),
     
     path('analytics/', views.analytics_view, name='analytics'),
+    path('analytics/data/', views.analytics_data, name='analytics_data'),
     path('budgets/', views.budget_view, name='budgets'),
     path('budgets/add/', views.add_budget, name='add_budget'),
 ]
@@ -1,18 +1,51 @@
 # expenses/utils.py
-from django.core.mail import send_mail
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
 from django.utils import timezone
 from .models import Bill
 
-def send_bill_reminders():
+REMINDER_DAYS = 3
+REMINDER_BATCH_SIZE = 100
+
+
+def bill_reminder(bill):
+    subject = f"Upcoming Bill Reminder: {bill.title}"
+    message = (
+        f"Hi {bill.user.username},\n\n"
+        f"Your bill '{bill.title}' of ₹{bill.amount} is due on {bill.due_date}.\n"
+        "Please pay it on time to avoid late fees.\n\n"
+        "Regards,\nExpense Tracker"
+    )
+    return EmailMessage(subject, message, settings.DEFAULT_FROM_EMAIL, [bill.user.email])
+
+
+def send_bill_reminders(batch_size=REMINDER_BATCH_SIZE, connection=None):
+    """
+    Email every unpaid bill due within REMINDER_DAYS that has not been reminded
+    for its current due date. Messages go out in batches over one SMTP
+    connection, and each batch is marked as reminded once it has been sent,
+    so a re-run skips it. Returns the number of reminders sent.
+    """
     today = timezone.now().date()
-    upcoming_bills = Bill.objects.filter(paid=False, due_date__lte=today + timezone.timedelta(days=3))
-
-    for bill in upcoming_bills:
-        subject = f"Upcoming Bill Reminder: {bill.title}"
-        message = (
-            f"Hi {bill.user.username},\n\n"
-            f"Your bill '{bill.title}' of ₹{bill.amount} is due on {bill.due_date}.\n"
-            "Please pay it on time to avoid late fees.\n\n"
-            "Regards,\nExpense Tracker"
-        )
-        send_mail(subject, message, 'spendora.notify@gmail.com', [bill.user.email])
+    upcoming_bills = (
+        Bill.objects.filter(paid=False, due_date__lte=today + timedelta(days=REMINDER_DAYS))
+        .exclude(reminded_for=F('due_date'))
+        .exclude(user__email='')
+        .select_related('user')
+        .order_by('due_date', 'id')
+    )
+
+    bills = list(upcoming_bills)
+    if not bills:
+        return 0
+
+    connection = connection or get_connection()
+    with connection:
+        for start in range(0, len(bills), batch_size):
+            batch = bills[start:start + batch_size]
+            connection.send_messages([bill_reminder(bill) for bill in batch])
+            Bill.objects.filter(id__in=[bill.id for bill in batch]).update(reminded_for=F('due_date'))
+    return len(bills)
@@ -4,27 +4,30 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Sum
+from django.db import transaction
 from .models import Budget, Expense 
-from .models import Expense, Wallet
-from .form import ExpenseForm
+from .models import Expense, ReportJob, Wallet
+from .form import ExpenseForm, ExpenseImportForm
+from .summary import SpendSummary
+from .cache import cached_context, request_data_version
+from .pagination import keyset_page
+from .filters import filter_expenses
+from .imports import InvalidStatement, import_expenses as import_statement
+from .jobs import enqueue_report
+from .budgets import budget_progress
+from .wallets import InvalidMembers, add_wallet_members, wallet_member_required, wallet_summary
 from django.views.decorators.cache import never_cache
-from django.db.models.functions import TruncMonth
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+from django.views.decorators.http import require_POST
 from budget.models import Insight
 from django.shortcuts import render
 import csv
-from django.http import HttpResponse
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.pdfgen import canvas
-from datetime import datetime
-import matplotlib.pyplot as plt
+import io
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+CSV_CHUNK_SIZE = 2000
 
 # Wallet views
 def expense_help(request):
@@ -46,75 +49,64 @@ def create_wallet(request):
         name = request.POST.get("name")
         members = request.POST.getlist("members")
 
-        wallet = Wallet.objects.create(
-            name=name,
-            created_by=request.user,
-        )
-        wallet.members.add(request.user)
-
-        for m in members:
-            user = User.objects.get(id=m)
-            wallet.members.add(user)
-
-        messages.success(request, "Wallet created successfully!")
-        return redirect("wallet-list")
+        try:
+            with transaction.atomic():
+                wallet = Wallet.objects.create(
+                    name=name,
+                    created_by=request.user,
+                )
+                add_wallet_members(wallet, [request.user.id, *members])
+        except InvalidMembers as exc:
+            messages.error(request, f"These members could not be found: {', '.join(map(str, exc.ids))}")
+        else:
+            messages.success(request, "Wallet created successfully!")
+            return redirect("wallet-list")
 
     users = User.objects.exclude(id=request.user.id)
     return render(request, "wallets/wallet_create.html", {"users": users})  # <-- match file name
 
+@login_required
+@wallet_member_required
 def wallet_detail(request, pk):
-    wallet = get_object_or_404(Wallet, pk=pk)
-    expenses = Expense.objects.filter(wallet=wallet).order_by('-date_created')
-    return render(request, "wallets/wallet_detail.html", {
-        "wallet": wallet,
-        "expenses": expenses
-    })
+    return wallet_page(request, pk)
 
-# Wallet dashboard (details)
 @login_required
-def wallet_dashboard(request, wallet_id):
+@require_POST
+@wallet_member_required
+def add_members(request, wallet_id):
     wallet = get_object_or_404(Wallet, id=wallet_id)
+    try:
+        added = add_wallet_members(wallet, request.POST.getlist("members"))
+    except InvalidMembers as exc:
+        messages.error(request, f"These members could not be found: {', '.join(map(str, exc.ids))}")
+    else:
+        messages.success(request, f"{len(added)} member(s) added.")
+    return redirect("wallet-detail", pk=wallet.id)
 
-    if request.user not in wallet.members.all():
-        messages.error(request, "You are not a member of this wallet.")
-        return redirect("wallet-list")
-
-    expenses = Expense.objects.filter(wallet=wallet).order_by("-date_created")
-    total_expense = expenses.aggregate(total=Sum("amount"))["total"] or 0
-
-    # Member-wise contribution
-    member_contrib = []
-    for member in wallet.members.all():
-        amt = expenses.filter(user=member).aggregate(sum=Sum("amount"))["sum"] or 0
-        member_contrib.append((member.username, amt))
+# Wallet dashboard (details)
+@login_required
+@wallet_member_required
+def wallet_dashboard(request, wallet_id):
+    return wallet_page(request, wallet_id)
 
-    # Category totals
-    categories = expenses.values_list("category", flat=True).distinct()
-    category_totals = [
-        expenses.filter(category=c).aggregate(total=Sum("amount"))["total"] or 0
-        for c in categories
-    ]
+def wallet_page(request, wallet_id):
+    wallet = get_object_or_404(Wallet.objects.select_related('created_by'), id=wallet_id)
+    expenses = Expense.objects.filter(wallet=wallet).select_related('user').order_by("-date_created")
 
-    context = {
+    context = wallet_summary(wallet)
+    context.update({
         "wallet": wallet,
         "expenses": expenses,
-        "total_expense": total_expense,
-        "member_contrib": member_contrib,
-        "categories": categories,
-        "category_totals": category_totals,
-    }
+    })
 
     return render(request, "wallets/wallet_detail.html", context)
 
 # Add expense to a wallet
 @login_required
+@wallet_member_required
 def add_wallet_expense(request, wallet_id):
     wallet = get_object_or_404(Wallet, id=wallet_id)
 
-    if request.user not in wallet.members.all():
-        messages.error(request, "You are not a member of this wallet.")
-        return redirect("wallet-list")
-
     if request.method == "POST":
         form = ExpenseForm(request.POST)
         if form.is_valid():
@@ -197,51 +189,25 @@ def logout_view(request):
 # Dashboard view
 @login_required
 def dashboard(request):
-    expenses = Expense.objects.filter(user=request.user).order_by('-date_created')
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    total_items = expenses.count()
-    total_categories = expenses.values('category').distinct().count()
-
-    categories = list(expenses.values_list('category', flat=True).distinct())
-    category_totals = [
-        expenses.filter(category=cat).aggregate(total=Sum('amount'))['total'] or 0
-        for cat in categories
-    ]
-
-    start_date = datetime.today() - relativedelta(months=5)
-    last_6_months = expenses.filter(date_created__gte=start_date).annotate(
-        month=TruncMonth('date_created')
-    ).values('month').annotate(total=Sum('amount')).order_by('month')
-
-    months = []
-    monthly_totals = []
-    monthly_dict = {entry['month'].strftime('%b %Y'): entry['total'] for entry in last_6_months}
-    for i in range(5, -1, -1):
-        month_date = datetime.today() - relativedelta(months=i)
-        month_label = month_date.strftime('%b %Y')
-        months.append(month_label)
-        monthly_totals.append(monthly_dict.get(month_label, 0))
-
-    insights = Insight.objects.filter(user=request.user).order_by('-created_at')[:5]
+    def build():
+        context = SpendSummary(request.user).as_context()
+        context['expenses'] = list(
+            Expense.objects.filter(user=request.user).order_by('-date_created')[:10]
+        )
+        return context
 
+    # "This month" and the 6-month series move on with the calendar, not just with writes
+    month = timezone.localdate().strftime('%Y-%m')
     context = {
-        'expenses': expenses[:10],
-        'total_expense': total_expense,
-        'total_items': total_items,
-        'total_categories': total_categories,
-        'categories': categories,
-        'category_totals': category_totals,
-        'months': months,
-        'monthly_totals': monthly_totals,
-        'insights': insights,
+        **cached_context(request.user, f'dashboard:{month}', build),
+        # Insights are written on every login, so they stay out of the versioned cache
+        'insights': Insight.objects.filter(user=request.user).order_by('-created_at')[:5],
     }
-
     return render(request, 'dashboard.html', context)
 
 @login_required
 def add_expense(request):
     user = request.user
-    expenses = Expense.objects.filter(user=user)
     predefined_categories = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Education","Other"]
 
     if request.method == "POST":
@@ -260,48 +226,63 @@ def add_expense(request):
     else:
         form = ExpenseForm()
 
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    monthly_expense = expenses.filter(date_created__month=datetime.now().month, date_created__year=datetime.now().year).aggregate(total=Sum('amount'))['total'] or 0
-    total_items = expenses.count()
-    avg_expense = round(total_expense / total_items, 2) if total_items else 0
-    max_expense = expenses.aggregate(max_amount=Sum('amount'))['max_amount'] or 0
-    categories = sorted(list(expenses.values_list('category', flat=True).distinct()))
-    category_totals = [expenses.filter(category=c).aggregate(total=Sum('amount'))['total'] or 0 for c in categories]
-
-    top_categories_qs = expenses.values('category').annotate(total=Sum('amount')).order_by('-total')[:3]
-    top_categories = [(c['category'], c['total']) for c in top_categories_qs]
-
-    context = {
+    context = SpendSummary(user).as_context()
+    context.update({
         'form': form,
-        'total_expense': total_expense,
-        'monthly_expense': monthly_expense,
-        'avg_expense': avg_expense,
-        'max_expense': max_expense,
-        'total_items': total_items,
-        'categories': categories,
-        'category_totals': category_totals,
-        'top_categories': top_categories,
         'predefined_categories': predefined_categories,
-    }
+    })
     return render(request, 'expenses/add_expense.html', context)
 
 @login_required
 def view_expenses(request):
-    expenses = Expense.objects.filter(user=request.user).order_by('-date_created')
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    total_items = expenses.count()
-    avg_expense = round(total_expense / total_items, 2) if total_items else 0
-    max_expense = expenses.aggregate(max_amount=Sum('amount'))['max_amount'] or 0
+    expenses, next_cursor = keyset_page(
+        Expense.objects.filter(user=request.user), request.GET.get('cursor')
+    )
+    summary = SpendSummary(request.user)
 
     context = {
         'expenses': expenses,
-        'total_expenses': total_expense,
-        'total_items': total_items,
-        'avg_expense': avg_expense,
-        'max_expense': max_expense,
+        'next_cursor': next_cursor,
+        'total_expenses': summary.total_expense,
+        'total_items': summary.total_items,
+        'avg_expense': summary.avg_expense,
+        'max_expense': summary.max_expense,
     }
     return render(request, 'expenses/view_expenses.html', context)
 
+@login_required
+def view_expenses_more(request):
+    # "Load more" fragment for view_expenses: the next page of rows as HTML
+    expenses, next_cursor = keyset_page(
+        Expense.objects.filter(user=request.user), request.GET.get('cursor')
+    )
+    html = render_to_string('expenses/expense_rows.html', {'expenses': expenses}, request=request)
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+@login_required
+def import_expenses(request):
+    form = ExpenseImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        # Read the upload as a text stream; large uploads stay in a temp file on disk
+        lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            result = import_statement(
+                request.user, lines,
+                columns=form.columns(),
+                date_format=form.cleaned_data['date_format'] or None,
+                debits=form.cleaned_data['debits'],
+            )
+        except InvalidStatement as exc:
+            form.add_error('file', str(exc))
+        else:
+            messages.success(request, f"Imported {result.imported} expenses.")
+            if result.credits:
+                messages.info(request, f"Left out {result.credits} credit rows (refunds, income).")
+            if result.skipped:
+                messages.warning(request, f"Skipped {result.skipped} rows. " + " ".join(result.errors))
+            return redirect('view_expenses')
+    return render(request, 'expenses/import_expenses.html', {'form': form})
+
 @login_required
 def edit_expense(request, expense_id):
     expense = get_object_or_404(Expense, id=expense_id, user=request.user)
@@ -323,44 +304,8 @@ def delete_expense(request, expense_id):
 
 @login_required
 def profile(request):
-    user = request.user
-    expenses = Expense.objects.filter(user=user)
-    total_expense = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    total_items = expenses.count()
-    avg_expense = round(total_expense / total_items, 2) if total_items else 0
-    max_expense = expenses.aggregate(max_amount=Sum('amount'))['max_amount'] or 0
-    total_categories = expenses.values('category').distinct().count()
-
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    monthly_expense = expenses.filter(date_created__month=current_month, date_created__year=current_year).aggregate(total=Sum('amount'))['total'] or 0
-
-    categories = list(expenses.values_list('category', flat=True).distinct())
-    category_totals = [expenses.filter(category=cat).aggregate(total=Sum('amount'))['total'] or 0 for cat in categories]
-
-    start_date = datetime.today() - relativedelta(months=5)
-    last_6_months = expenses.filter(date_created__gte=start_date).annotate(month=TruncMonth('date_created')).values('month').annotate(total=Sum('amount')).order_by('month')
-    months = []
-    monthly_totals = []
-    monthly_dict = {entry['month'].strftime('%b %Y'): entry['total'] for entry in last_6_months}
-    for i in range(5, -1, -1):
-        month_date = datetime.today() - relativedelta(months=i)
-        month_label = month_date.strftime('%b %Y')
-        months.append(month_label)
-        monthly_totals.append(monthly_dict.get(month_label, 0))
-
-    context = {
-        'total_expense': total_expense,
-        'monthly_expense': monthly_expense,
-        'avg_expense': avg_expense,
-        'max_expense': max_expense,
-        'total_items': total_items,
-        'total_categories': total_categories,
-        'categories': categories,
-        'category_totals': category_totals,
-        'months': months,
-        'monthly_totals': monthly_totals,
-    }
+    month = timezone.localdate().strftime('%Y-%m')
+    context = cached_context(request.user, f'profile:{month}', lambda: SpendSummary(request.user).as_context())
     return render(request, 'profile.html', context)
 
 @login_required
@@ -390,160 +335,102 @@ def change_password(request):
     return render(request, "change_password.html", {"form": form})
 
 
+class Echo:
+    """File-like object whose write() hands the line back, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+
 @login_required
 def export_csv(request):
-    # Create the HttpResponse object with CSV header
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="expenses.csv"'
+    # Stream rows straight from a server-side iterator: memory stays flat and
+    # the first bytes go out before the last row is read.
+    expenses = filter_expenses(Expense.objects.filter(user=request.user), request.GET)
+    rows = expenses.order_by('-date_created').values_list(
+        'title', 'amount', 'category', 'date_created'
+    ).iterator(chunk_size=CSV_CHUNK_SIZE)
 
-    writer = csv.writer(response)
-    writer.writerow(['Title', 'Amount', 'Category', 'Date'])
+    writer = csv.writer(Echo())
 
-    expenses = Expense.objects.filter(user=request.user).order_by('-date_created')
-
-    for expense in expenses:
-        writer.writerow([expense.title, expense.amount, expense.category, expense.date_created])
+    def stream():
+        yield writer.writerow(['Title', 'Amount', 'Category', 'Date'])
+        for row in rows:
+            yield writer.writerow(row)
 
+    response = StreamingHttpResponse(stream(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="expenses.csv"'
     return response
 
 
 
-
+@login_required
+@require_POST
 def export_pdf(request):
-    expenses = Expense.objects.filter(user=request.user).order_by('-date_created')
-    
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=100, bottomMargin=50, leftMargin=50, rightMargin=50)
-    elements = []
-
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'title',
-        parent=styles['Heading1'],
-        fontSize=24,
-        alignment=1,  # center
-        textColor=colors.HexColor("#4f46e5"),
-        spaceAfter=10
-    )
-    subtitle_style = ParagraphStyle(
-        'subtitle',
-        parent=styles['Normal'],
-        fontSize=12,
-        alignment=1,
-        textColor=colors.grey,
-        spaceAfter=20
-    )
-    
-    elements.append(Paragraph("Spendora – My Expense Tracker", title_style))
-    elements.append(Paragraph(f"Report for: {request.user.username}", subtitle_style))
-    elements.append(Paragraph(f"Generated on: {datetime.now().strftime('%d %b %Y, %H:%M')}", subtitle_style))
-    
-    total_amount = sum([exp.amount for exp in expenses])
-    elements.append(Paragraph(f"<b>Total Expenses:</b> ₹{total_amount:.2f}", styles['Normal']))
-    elements.append(Spacer(1, 0.5*cm))
-    
-    data = [['Title', 'Category', 'Amount (₹)', 'Date']]
-    for i, exp in enumerate(expenses):
-        row_color = colors.whitesmoke if i % 2 == 0 else colors.lightgrey
-        data.append([exp.title, exp.category, f"{exp.amount:.2f}", exp.date_created.strftime('%d %b %Y')])
-    
-    table = Table(data, colWidths=[7*cm, 4*cm, 3*cm, 4*cm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#4f46e5")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 12),
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-    ]))
-    
-    for i in range(1, len(data)):
-        bg_color = colors.whitesmoke if i % 2 == 0 else colors.lightgrey
-        table.setStyle([('BACKGROUND', (0,i), (-1,i), bg_color)])
-    
-    elements.append(table)
-    elements.append(Spacer(1, 1*cm))
-    
-    if expenses.exists():
-        category_totals = {}
-        for exp in expenses:
-            category_totals[exp.category] = category_totals.get(exp.category, 0) + exp.amount
-        plt.figure(figsize=(4,4))
-        plt.pie(category_totals.values(), labels=category_totals.keys(), autopct='%1.1f%%', startangle=140)
-        plt.title("Expenses by Category")
-        chart_buffer = BytesIO()
-        plt.savefig(chart_buffer, format='PNG', bbox_inches='tight')
-        plt.close()
-        chart_buffer.seek(0)
-        elements.append(Image(chart_buffer, width=12*cm, height=12*cm))
-    
-    def add_page_number(canvas, doc):
-        page_num = canvas.getPageNumber()
-        text = f"Page {page_num}"
-        canvas.setFont('Helvetica', 10)
-        canvas.drawRightString(A4[0] - 50, 20, text)
-    doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-    buffer.seek(0)
-    
-    return HttpResponse(buffer, content_type='application/pdf')
-
-
-from django.db.models import Sum, Max, Avg
-# ... other imports
+    # Rendering runs in the run_report_worker process, not in this web worker
+    job = enqueue_report(request.user)
+    return redirect('report_job', job_id=job.id)
+
+@login_required
+def report_job(request, job_id):
+    job = get_object_or_404(ReportJob.objects.defer('pdf'), id=job_id, user=request.user)
+    return render(request, 'reports/report_job.html', {'job': job})
+
+@login_required
+def report_job_status(request, job_id):
+    job = get_object_or_404(ReportJob.objects.defer('pdf'), id=job_id, user=request.user)
+    return JsonResponse({
+        'status': job.status,
+        'progress': job.progress,
+        'error': job.error,
+        'download_url': reverse('report_job_download', args=[job.id]) if job.status == ReportJob.DONE else None,
+    })
+
+@login_required
+def report_job_download(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, user=request.user, status=ReportJob.DONE)
+    return FileResponse(io.BytesIO(job.pdf), content_type='application/pdf', filename=f"expenses-{job.pk}.pdf")
+
 
 @login_required
 def analytics_view(request):
-    user_expenses = Expense.objects.filter(user=request.user)
-    
-    # Summary Stats
-    total_spending = user_expenses.aggregate(Sum('amount'))['amount__sum'] or 0
-    max_expense = user_expenses.aggregate(Max('amount'))['amount__max'] or 0
-    avg_expense = user_expenses.aggregate(Avg('amount'))['amount__avg'] or 0
+    summary = SpendSummary(request.user)
 
     # Grouping data for the chart AND the list
     # This creates: [{'category': 'Food', 'total': 200}, {'category': 'Bills', 'total': 1200}]
-    category_data = user_expenses.values('category').annotate(total=Sum('amount')).order_by('-total')
+    category_data = [{'category': c, 'total': t} for c, t in summary.ranked_categories]
 
     # Prepare lists for Chart.js
     labels = [item['category'] for item in category_data]
     values = [float(item['total']) for item in category_data]
 
     context = {
-        'total_spending': total_spending,
-        'max_expense': max_expense,
-        'avg_expense': round(avg_expense, 2),
+        'total_spending': summary.total_expense,
+        'max_expense': summary.max_expense,
+        'avg_expense': summary.avg_expense,
         'labels': labels,
         'values': values,
         'category_data': category_data,  # Critical for fixing "Syncing..."
     }
     return render(request, 'analytics.html', context)
 
+@login_required
+def analytics_data(request):
+    # NumPy is only loaded once someone opens the analytics page
+    from .analytics import SpendAnalytics
+
+    # Rolling windows end today, so the day is part of the cache name
+    today = timezone.localdate()
+    data = cached_context(
+        request.user, f'analytics:{today.isoformat()}',
+        lambda: SpendAnalytics.for_user(request.user, today).as_dict(),
+        request_data_version(request)[0],
+    )
+    return JsonResponse(data)
+
 
 @login_required
 def budget_view(request):
-    user_budgets = Budget.objects.filter(user=request.user)
-    budget_list = []
-
-    for b in user_budgets:
-        spent = Expense.objects.filter(
-            user=request.user, 
-            category=b.category
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        percent = (spent / b.amount) * 100 if b.amount > 0 else 0
-        
-        budget_list.append({
-            'category': b.category,
-            'limit': b.amount,
-            'spent': spent,
-            'percent': min(percent, 100),
-            'remaining': b.amount - spent,
-            'color': "danger" if percent >= 90 else "warning" if percent >= 70 else "primary",
-            'icon': b.icon
-        })
-        
-    return render(request, 'budgets.html', {'budgets': budget_list})
+    return render(request, 'budgets.html', {'budgets': budget_progress(request.user)})
 
 @login_required
 def add_budget(request):
@@ -0,0 +1,116 @@
+# expenses/wallets.py
+from decimal import Decimal
+from functools import wraps
+
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.shortcuts import redirect
+
+from .cache import bump_data_versions
+from .models import ExpenseRollup, Wallet
+from .money import MoneyField
+
+Membership = Wallet.members.through
+
+
+class InvalidMembers(Exception):
+    """Raised with every member id that does not match a user."""
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__(f"Unknown users: {', '.join(map(str, ids))}")
+
+
+@transaction.atomic
+def add_wallet_members(wallet, member_ids):
+    """
+    Add users to a wallet with one in_bulk lookup and one bulk insert into
+    the members through table. Existing members are skipped. If any id is
+    unknown nothing is added and InvalidMembers lists all of them.
+    """
+    ids = []
+    invalid = []
+    for member_id in member_ids:
+        try:
+            ids.append(int(member_id))
+        except (TypeError, ValueError):
+            invalid.append(member_id)
+
+    users = User.objects.in_bulk(ids)
+    invalid += [pk for pk in dict.fromkeys(ids) if pk not in users]
+    if invalid:
+        raise InvalidMembers(invalid)
+
+    Membership.objects.bulk_create(
+        [Membership(wallet_id=wallet.pk, user_id=pk) for pk in users],
+        ignore_conflicts=True,
+    )
+    # bulk_create skips m2m_changed, so invalidate the members' cached pages here
+    bump_data_versions(users)
+    return list(users.values())
+
+
+def is_wallet_member(request, wallet_id):
+    """
+    Whether request.user belongs to the wallet: one EXISTS on the members
+    through table (covered by its unique (wallet, user) index), remembered
+    for the rest of the request.
+    """
+    known = request.__dict__.setdefault('_wallet_membership', {})
+    wallet_id = int(wallet_id)
+    if wallet_id not in known:
+        known[wallet_id] = (
+            request.user.is_authenticated
+            and Membership.objects.filter(wallet_id=wallet_id, user_id=request.user.pk).exists()
+        )
+    return known[wallet_id]
+
+
+def wallet_member_required(view):
+    """Send non-members of the wallet in the URL (wallet_id or pk) back to their wallet list."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        wallet_id = kwargs['wallet_id'] if 'wallet_id' in kwargs else kwargs['pk']
+        if not is_wallet_member(request, wallet_id):
+            messages.error(request, "You are not a member of this wallet.")
+            return redirect("wallet-list")
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def wallet_summary(wallet):
+    """
+    Totals for a wallet page: one query for members with their contribution
+    (zero for members who have not spent) and one for per-category totals,
+    both read from ExpenseRollup instead of the wallet's expense rows.
+    """
+    rollups = ExpenseRollup.objects.filter(wallet=wallet)
+    contributed = (
+        rollups.filter(user=OuterRef('pk'))
+        .values('user')
+        .annotate(total=Sum('total'))
+        .values('total')
+    )
+    members = list(
+        User.objects.filter(wallets=wallet)
+        .annotate(contributed=Coalesce(Subquery(contributed), Value(Decimal('0')), output_field=MoneyField()))
+        .order_by('username')
+    )
+    category_rows = rollups.values_list('category').annotate(total=Sum('total')).order_by('-total', 'category')
+
+    categories = []
+    category_totals = []
+    for category, total in category_rows:
+        categories.append(category)
+        category_totals.append(total)
+
+    return {
+        'members': members,
+        'member_contrib': [(m.username, m.contributed) for m in members],
+        'total_expense': sum(category_totals),
+        'categories': categories,
+        'category_totals': category_totals,
+        'category_contrib': list(zip(categories, category_totals)),
+    }
@@ -2,4 +2,5 @@
 
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py createcachetable
 